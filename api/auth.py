@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import math
+
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from jose import JWTError
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.security import create_access_token
-from core.database import get_db
-from crud.auth import authenticate_user
-from schemas.token import Token
+from core.login_guard import login_guard
+from core.config import settings
+from core.security import password_hasher, HashingQueueFull, oauth2_scheme, decode_access_token, key_ring
+from core.database import get_async_db, get_async_read_db
+from core.metrics import auth_failures
+from crud.auth import (
+    authenticate_user_async,
+    issue_token_pair_async,
+    rotate_refresh_token_async,
+    revoke_access_token_async,
+)
+from schemas.token import TokenPair, RefreshRequest
 
 router = APIRouter(
     tags=["authentication"],
@@ -14,20 +25,97 @@ router = APIRouter(
 
 @router.post(
     "/token",
-    response_model=Token
+    response_model=TokenPair
 )
 async def login_for_access_token(
+        request: Request,
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_read_db),
+        write_db: AsyncSession = Depends(get_async_db),
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    # Both checks run before any Argon2 work is queued
+    ip = request.client.host if request.client else None
+    retry_after = login_guard.retry_after(form_data.username, ip)
+    if retry_after > 0:
+        auth_failures.inc("login_throttled")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    try:
+        slot = password_hasher.admit()
+    except HashingQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login is temporarily overloaded",
+            headers={"Retry-After": "1"},
+        )
+
+    # The writer is only taken after the hash check, to rehash and record the refresh token
+    with slot:
+        user = await authenticate_user_async(form_data.username, form_data.password, db, write_db)
     if not user:
+        login_guard.record_failure(form_data.username, ip)
+        auth_failures.inc("bad_credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    login_guard.record_success(form_data.username)
+
+    pair = await issue_token_pair_async(user, write_db)
+    await write_db.commit()
+    return pair
+
 
-    access_token = create_access_token(data={"name": user.username})
+@router.post(
+    "/token/refresh",
+    response_model=TokenPair
+)
+async def refresh_access_token(
+        refresh_request: RefreshRequest,
+        db: AsyncSession = Depends(get_async_db),
+):
+    """Exchange a refresh token for a new token pair; the old refresh token stops working"""
+    pair = await rotate_refresh_token_async(refresh_request.refresh_token, db)
+    if pair is None:
+        auth_failures.inc("invalid_refresh_token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return pair
+
+
+@router.post(
+    "/token/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout(
+        refresh_request: RefreshRequest | None = None,
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
+):
+    """Revoke the presented access token, and the refresh token if one is sent"""
+    try:
+        claims = decode_access_token(token)
+    except JWTError:
+        auth_failures.inc("invalid_token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await revoke_access_token_async(
+        claims, db, refresh_request.refresh_token if refresh_request else None
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    return {"access_token": access_token, "token_type": "bearer"}
 
+@router.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Public keys for verifying access tokens locally; empty with a shared-secret algorithm"""
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"
+    return key_ring.jwks()
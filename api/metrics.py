@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from core.database import pool_stats
+from core.login_guard import login_guard
+from core.metrics import REGISTRY, GaugeCallback
+from core.revocation import revocation_list
+from core.rbac import require_permission, principal_cache
+from core.security import password_hasher, token_cache
+from schemas.user import Permission
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+REGISTRY.register(GaugeCallback(
+    "db_pool_connections", "Connections per async engine pool.", ("engine", "state"),
+    lambda: {
+        (engine, state): value
+        for engine, stats in pool_stats().items()
+        for state, value in stats.items()
+    },
+))
+REGISTRY.register(GaugeCallback(
+    "password_hasher", "Argon2 process pool size and backlog.", ("stat",),
+    lambda: {(stat,): value for stat, value in password_hasher.stats().items()},
+))
+REGISTRY.register(GaugeCallback(
+    "cache", "In-process cache sizes and hit/miss/eviction counts.", ("cache", "stat"),
+    lambda: {
+        (name, stat): value
+        for name, cache in (("principal", principal_cache), ("token", token_cache))
+        for stat, value in cache.stats().items()
+    },
+))
+
+REGISTRY.register(GaugeCallback(
+    "login_guard", "Usernames and IPs with recent failed logins.", ("stat",),
+    lambda: {(stat,): value for stat, value in login_guard.stats().items()},
+))
+
+REGISTRY.register(GaugeCallback(
+    "revocation_list", "Revoked tokens held in memory and the last denylist row applied.", ("stat",),
+    lambda: {(stat,): value for stat, value in revocation_list.stats().items()},
+))
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_permission(Permission.VIEW_METRICS))]
+)
+async def metrics():
+    """Prometheus metrics for this worker (requires VIEW_METRICS permission)"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,26 @@
-from fastapi import APIRouter, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, status, Path, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import Field, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, Query
-from typing import Annotated
+from typing import Annotated, Literal
+import time
 
-from core.database import get_db
-from core.rbac import get_current_active_user, has_permission, require_permission
-from crud.user import get_user_by_username, get_user_by_email, create_user, update_user, get_all_users, \
-    update_user_role, get_user_by_id, update_user_status, add_user_permission, remove_user_permission, delete_user
-from schemas.user import User, UserCreate, UserUpdate, Permission, Role
+from core.change_feed import user_changes
+from core.config import settings
+from core.database import get_async_db, get_async_read_db
+from core.rbac import Principal, get_current_active_user, has_permission, require_permission
+from crud.auth import revoke_user_tokens_async
+from crud.user import get_user_by_username_async, get_user_by_email_async, create_user_async, import_users_async, \
+    update_user_async, get_all_users_async, stream_users_async, update_user_role_async, get_user_by_id_async, \
+    update_user_status_async, add_user_permission_async, remove_user_permission_async, delete_user_async, \
+    apply_user_batch_async, get_users_by_ids_or_usernames_async, get_user_changes_async
+from schemas.user import User, UserCreate, UserUpdate, Permission, Role, UserImportResult, UserImportSummary, \
+    UserBatchRequest, UserBatchSummary, UserLookupResponse, UserChangesResponse
+from utils.etag import user_etag, list_etag, etag_matches
+from utils.export import ndjson_lines, csv_lines, chunked
+from utils.ndjson import iter_lines
+from utils.pagination import MAX_SQLITE_INTEGER, encode_cursor, decode_cursor
 
 router = APIRouter(
     prefix="/users",
@@ -19,29 +32,91 @@ router = APIRouter(
     "/user",
     response_model=User
 )
-async def register_user(user: UserCreate, db: Session = Depends(get_db)) -> User:
+async def register_user(
+        user: UserCreate,
+        db: AsyncSession = Depends(get_async_db),
+        read_db: AsyncSession = Depends(get_async_read_db)
+) -> User:
     """Register a new user."""
-    existing_user = get_user_by_username(user.username, db)
+    existing_user = await get_user_by_username_async(user.username, read_db)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists"
         )
 
-    existing_email = get_user_by_email(user.email, db)
+    existing_email = await get_user_by_email_async(user.email, read_db)
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists."
         )
+    # Hand the read connection back before the password is hashed
+    await read_db.commit()
 
-    return create_user(user, db)
+    return await create_user_async(user, db)
+
+
+@router.post(
+    "/import",
+    response_model=UserImportSummary,
+    dependencies=[Depends(require_permission(Permission.CREATE_USER))]
+)
+async def import_users(request: Request, db: AsyncSession = Depends(get_async_db)) -> UserImportSummary:
+    """Bulk-create users from an NDJSON body of UserCreate records (requires CREATE_USER permission)"""
+    results: list[UserImportResult] = []
+    batch: list[tuple[int, UserCreate]] = []
+
+    async for line_number, line in iter_lines(request.stream()):
+        try:
+            batch.append((line_number, UserCreate.model_validate_json(line)))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'body'}: {err['msg']}" for err in e.errors())
+            results.append(UserImportResult(line=line_number, status="invalid", detail=detail))
+
+        if len(batch) >= settings.USER_IMPORT_BATCH_SIZE:
+            results.extend(await import_users_async(batch, db))
+            batch = []
+
+    if batch:
+        results.extend(await import_users_async(batch, db))
+
+    results.sort(key=lambda result: result.line)
+    created = sum(result.status == "created" for result in results)
+    return UserImportSummary(created=created, failed=len(results) - created, results=results)
+
+
+@router.post(
+    "/batch",
+    response_model=UserBatchSummary,
+    dependencies=[Depends(require_permission(Permission.MANAGE_ROLES))]
+)
+async def batch_update_users(
+        batch: UserBatchRequest,
+        db: AsyncSession = Depends(get_async_db)
+) -> UserBatchSummary:
+    """Change role, status or permissions of many users in one transaction (requires MANAGE_ROLES permission)"""
+    results = await apply_user_batch_async(batch, db)
+    updated = sum(result.status == "updated" for result in results)
+    return UserBatchSummary(updated=updated, failed=len(results) - updated, results=results)
 
 
 @router.get(
     "/me",
     response_model=User
 )
-async def read_user(current_user: User = Depends(get_current_active_user)) -> User:
-    """Get current user."""
+async def read_user(
+        request: Request,
+        response: Response,
+        current_user: Principal = Depends(get_current_active_user)
+) -> User:
+    """Get current user.
+
+    Answers a matching ``If-None-Match`` with 304; with the principal cached, that
+    involves no database query and no serialization.
+    """
+    etag = user_etag(current_user.id, current_user.row_version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return current_user
 
 
@@ -50,7 +125,7 @@ async def update_user_details(
         user_update: UserUpdate,
         user_id: str = Path(..., title="The ID of the user to update."),
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     if str(current_user.id) != user_id and not has_permission(current_user, Permission.UPDATE_USER):
         raise HTTPException(
@@ -59,7 +134,7 @@ async def update_user_details(
         )
 
     try:
-        updated_user = update_user(int(user_id), user_update, db)
+        updated_user = await update_user_async(int(user_id), user_update, db)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -75,12 +150,129 @@ async def update_user_details(
     dependencies=[Depends(require_permission(Permission.READ_USER))]
 )
 async def read_users(
+        request: Request,
+        response: Response,
         skip: Annotated[int, Query(ge=0)] = 0,
         limit: Annotated[int, Query(ge=1, le=100)] = 10,
-        db: Session = Depends(get_db)
+        cursor: str | None = None,
+        role: Role | None = None,
+        disabled: bool | None = None,
+        username_prefix: Annotated[str | None, Query(max_length=50)] = None,
+        permission: Permission | None = None,
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all users (requires READ_USER permission)"""
-    return get_all_users(db, skip, limit)
+    """Get all users (requires READ_USER permission)
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the next page.
+    The page's ETag covers every row on it, so a matching ``If-None-Match`` gets 304.
+    """
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    users = await get_all_users_async(
+        db, skip, limit + 1,
+        after_id=after_id, role=role, disabled=disabled, username_prefix=username_prefix, permission=permission,
+    )
+    # The row past the page decides X-Next-Cursor, so it counts towards the tag
+    etag = list_etag((user.id, user.row_version) for user in users)
+    headers = {"ETag": etag}
+    if len(users) > limit:
+        users = users[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(users[-1].id)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return users
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_permission(Permission.READ_USER))]
+)
+async def export_users(
+        format: Annotated[Literal["ndjson", "csv"], Query()] = "ndjson",
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Stream every user as NDJSON or CSV (requires READ_USER permission)"""
+    rows = stream_users_async(db)
+    if format == "csv":
+        return StreamingResponse(
+            chunked(csv_lines(rows)),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+        )
+    return StreamingResponse(chunked(ndjson_lines(rows)), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/lookup",
+    response_model=UserLookupResponse,
+    dependencies=[Depends(require_permission(Permission.READ_USER))]
+)
+async def lookup_users(
+        ids: Annotated[
+            list[Annotated[int, Field(ge=1, le=MAX_SQLITE_INTEGER)]],
+            Query(alias="id", max_length=settings.USER_LOOKUP_MAX_ITEMS),
+        ] = [],
+        usernames: Annotated[list[str], Query(alias="username", max_length=settings.USER_LOOKUP_MAX_ITEMS)] = [],
+        db: AsyncSession = Depends(get_async_read_db)
+) -> UserLookupResponse:
+    """Resolve many users by repeated id and username parameters in one query (requires READ_USER permission)
+
+    Users come back in request order, ids first; duplicates are returned once.
+    """
+    if len(ids) + len(usernames) > settings.USER_LOOKUP_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USER_LOOKUP_MAX_ITEMS} ids and usernames per lookup",
+        )
+    ids, usernames = list(dict.fromkeys(ids)), list(dict.fromkeys(usernames))
+    found = await get_users_by_ids_or_usernames_async(ids, usernames, db)
+    by_id = {user.id: user for user in found}
+    by_username = {user.username: user for user in found}
+
+    users, seen = [], set()
+    for user in [by_id.get(user_id) for user_id in ids] + [by_username.get(name) for name in usernames]:
+        if user is not None and user.id not in seen:
+            seen.add(user.id)
+            users.append(user)
+    return UserLookupResponse(
+        users=users,
+        missing_ids=[user_id for user_id in ids if user_id not in by_id],
+        missing_usernames=[name for name in usernames if name not in by_username],
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=UserChangesResponse,
+    dependencies=[Depends(require_permission(Permission.READ_USER))]
+)
+async def get_user_changes(
+        since: int = Query(0, ge=0, le=MAX_SQLITE_INTEGER),
+        limit: int = Query(100, ge=1, le=1000),
+        wait: float = Query(0, ge=0, le=settings.CHANGE_FEED_MAX_WAIT_SECONDS),
+        db: AsyncSession = Depends(get_async_read_db)
+) -> UserChangesResponse:
+    """Users created, changed or deleted since a version cursor (requires READ_USER permission)
+
+    Start with ``since=0`` and pass back ``next_since``. With ``wait``, an empty
+    result is held for up to that many seconds until something changes.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        page = await get_user_changes_async(since, limit, db)
+        remaining = deadline - time.monotonic()
+        if page.changes or remaining <= 0:
+            return page
+        # End the read transaction, so the next check sees new commits
+        await db.commit()
+        await user_changes.wait(min(remaining, settings.CHANGE_FEED_POLL_SECONDS))
 
 
 @router.patch(
@@ -91,9 +283,9 @@ async def read_users(
 async def update_role(
         role: Role,
         user_id: str = Path(..., title="The ID of the user to update."),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = update_user_role(int(user_id), role, db)
+    user = await update_user_role_async(int(user_id), role, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -108,16 +300,25 @@ async def update_role(
 
 )
 async def read_user(
+        request: Request,
+        response: Response,
         user_id: str = Path(..., title="The ID of the user to get."),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get a specific user by id (requires READ_USER permission)"""
-    user = get_user_by_id(int(user_id), db)
+    """Get a specific user by id (requires READ_USER permission)
+
+    Answers a matching ``If-None-Match`` with 304 without serializing the user.
+    """
+    user = await get_user_by_id_async(int(user_id), db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    etag = user_etag(user.id, user.row_version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return user
 
 
@@ -129,18 +330,34 @@ async def read_user(
 async def update_user_status_endpoint(
         disabled: bool,
         user_id: str = Path(..., title="The ID of the user to update."),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    updated = update_user_status(int(user_id), disabled, db)
-    if not updated:
+    user = await update_user_status_async(int(user_id), disabled, db)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
-    user = get_user_by_id(int(user_id), db)
     return user
 
 
+@router.post(
+    "/{user_id}/revoke-tokens",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_permission(Permission.MANAGE_ROLES))]
+)
+async def revoke_user_tokens_endpoint(
+        user_id: str = Path(..., title="The ID of the user whose tokens to revoke."),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Invalidate every access and refresh token issued to the user so far"""
+    revoked = await revoke_user_tokens_async(int(user_id), db)
+    if not revoked:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return None
+
+
 @router.post(
     "/{user_id}/permissions/add",
     response_model=User,
@@ -149,9 +366,9 @@ async def update_user_status_endpoint(
 async def add_permission(
         permission: Permission,
         user_id: str = Path(..., title="The ID of the user to update."),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = add_user_permission(user_id, permission, db)
+    user = await add_user_permission_async(int(user_id), permission, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -167,9 +384,9 @@ async def add_permission(
 async def remove_permission(
         permission: Permission,
         user_id: str = Path(..., title="The ID of the user to update."),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = remove_user_permission(int(user_id), permission, db)
+    user = await remove_user_permission_async(int(user_id), permission, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -184,14 +401,14 @@ async def remove_permission(
 async def delete_user_endpoint(
         user_id: str = Path(..., title="The ID of the user to delete."),
         current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     if str(current_user.id) != user_id and not has_permission(current_user, Permission.UPDATE_USER):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to update this user"
         )
-    deleted = delete_user(int(user_id), db)
+    deleted = await delete_user_async(int(user_id), db)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
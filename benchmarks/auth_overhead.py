@@ -0,0 +1,72 @@
+"""Per-request auth overhead with and without the verified-token cache.
+
+    python -m benchmarks.auth_overhead
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import use_temp_database, summarize, print_summary
+
+
+def _per_call_us(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def _requests(client, headers: dict, iterations: int) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await client.get("/users/me", headers=headers)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(iterations: int) -> None:
+    import httpx
+    from core.database_utils import init_database
+    from core.security import create_access_token, decode_access_token, verify_jwt, token_cache, password_hasher
+    from main import app
+
+    init_database(force_recreate=True)
+    token = create_access_token(data={"name": "bench"})
+
+    uncached = _per_call_us(
+        lambda: verify_jwt(token), iterations
+    )
+    decode_access_token(token)
+    cached = _per_call_us(lambda: decode_access_token(token), iterations)
+    print(f"verify_jwt                       {uncached:8.2f}us/call")
+    print(f"decode_access_token (cached)     {cached:8.2f}us/call")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/users/user", json={"email": "bench@example.com", "username": "bench", "password": "pw"})
+        headers = {"Authorization": f"Bearer {token}"}
+        await _requests(client, headers, 10)
+
+        with_cache = await _requests(client, headers, iterations)
+        maxsize, token_cache.maxsize = token_cache.maxsize, 0
+        token_cache.clear()
+        without_cache = await _requests(client, headers, iterations)
+        token_cache.maxsize = maxsize
+
+    print_summary("GET /users/me (token cache)", summarize(with_cache))
+    print_summary("GET /users/me (no token cache)", summarize(without_cache))
+    password_hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    use_temp_database()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Throughput of POST /users/import against looping over POST /users/user.
+
+    python -m benchmarks.bulk_import --users 2000 --workers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import use_temp_database
+
+
+async def run(count: int) -> None:
+    import httpx
+
+    from core.database_utils import init_database
+    from core.security import password_hasher
+    from main import app
+
+    init_database(force_recreate=True)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/users/user", json={
+            "email": "admin@example.com", "username": "admin", "password": "password", "role": "admin",
+        })
+        response = await client.post("/token", data={"username": "admin", "password": "password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        started = time.perf_counter()
+        for i in range(count):
+            await client.post("/users/user", json={
+                "email": f"loop{i}@example.com", "username": f"loop{i}", "password": "password",
+            })
+        loop_elapsed = time.perf_counter() - started
+
+        body = "\n".join(
+            json.dumps({"email": f"bulk{i}@example.com", "username": f"bulk{i}", "password": "password"})
+            for i in range(count)
+        )
+        started = time.perf_counter()
+        response = await client.post(
+            "/users/import", content=body.encode(), headers={**headers, "Content-Type": "application/x-ndjson"}
+        )
+        bulk_elapsed = time.perf_counter() - started
+        assert response.json()["created"] == count, response.json()["failed"]
+
+    print(f"hash workers={password_hasher.max_workers} users={count}")
+    print(f"POST /users/user loop   {count / loop_elapsed:10.1f} users/s ({loop_elapsed:.2f}s)")
+    print(f"POST /users/import      {count / bulk_elapsed:10.1f} users/s ({bulk_elapsed:.2f}s)")
+    print(f"speedup                 {loop_elapsed / bulk_elapsed:10.1f}x")
+    password_hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    use_temp_database()
+    asyncio.run(run(args.users))
+
+
+if __name__ == "__main__":
+    main()
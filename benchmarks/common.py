@@ -0,0 +1,45 @@
+import os
+import statistics
+import tempfile
+
+
+def use_temp_database(name: str = "bench.sqlite3") -> str:
+    """Point the app at a throwaway SQLite file and lift rate limits. Must run before importing app modules."""
+    path = os.path.join(tempfile.mkdtemp(prefix="uknf-bench-"), name)
+    os.environ["SQLITE_DB_NAME"] = path
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return path
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def print_summary(label: str, summary: dict[str, float]) -> None:
+    print(
+        f"{label:<32} n={summary['count']:<6} mean={summary['mean_ms']:8.2f}ms "
+        f"p50={summary['p50_ms']:8.2f}ms p95={summary['p95_ms']:8.2f}ms p99={summary['p99_ms']:8.2f}ms"
+    )
+
+
+def seed_users(count: int, seed: int = 0) -> None:
+    """Insert ``count`` users through the bulk seeder; every account's password is "password"."""
+    from core.database_seed import seed_users as bulk_seed_users
+
+    bulk_seed_users(count, seed=seed, passwords=("password",))
@@ -0,0 +1,59 @@
+"""RSS of the worker while streaming a full user export.
+
+    python -m benchmarks.export_memory --rows 5000000
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+from benchmarks.common import use_temp_database, seed_users
+
+
+def _rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / 2 ** 20
+
+
+async def run(format: str) -> None:
+    from core.database import AsyncSessionLocal, async_engine
+    from crud.user import stream_users_async
+    from utils.export import ndjson_lines, csv_lines, chunked
+
+    serialize = csv_lines if format == "csv" else ndjson_lines
+    started = time.perf_counter()
+    start_rss = peak_rss = _rss_mib()
+    rows = size = 0
+    async with AsyncSessionLocal() as db:
+        async for chunk in chunked(serialize(stream_users_async(db))):
+            lines = chunk.count("\n")
+            rows += lines
+            size += len(chunk)
+            if rows % 100_000 < lines:
+                peak_rss = max(peak_rss, _rss_mib())
+                print(f"{rows:>10} rows  rss={_rss_mib():8.1f}MiB")
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    print(f"{format}: {rows} lines, {size / 2 ** 20:.1f}MiB in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"rss start={start_rss:.1f}MiB peak={peak_rss:.1f}MiB growth={peak_rss - start_rss:.1f}MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    use_temp_database()
+
+    from core.database_utils import init_database
+
+    init_database(force_recreate=True)
+    seed_users(args.rows)
+    asyncio.run(run(args.format))
+
+
+if __name__ == "__main__":
+    main()
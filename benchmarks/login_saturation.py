@@ -0,0 +1,81 @@
+"""Latency of unrelated endpoints while /token is saturated with logins.
+
+    python -m benchmarks.login_saturation --workers 0   # hash on the event loop
+    python -m benchmarks.login_saturation --workers 4   # hash in a process pool
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import use_temp_database, summarize, print_summary
+
+
+async def _login_loop(client, username: str, stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.post("/token", data={"username": username, "password": "password"})
+        latencies.append(time.perf_counter() - started)
+
+
+async def _probe_loop(client, path: str, headers: dict, stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+
+
+async def run(concurrency: int, duration: float) -> None:
+    import httpx
+
+    from core.database_utils import init_database
+    from core.security import password_hasher
+    from main import app
+
+    init_database(force_recreate=True)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(concurrency):
+            await client.post(
+                "/users/user",
+                json={"email": f"user{i}@example.com", "username": f"user{i}", "password": "password"},
+            )
+        response = await client.post("/token", data={"username": "user0", "password": "password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        stop = asyncio.Event()
+        logins, health, me = [], [], []
+        tasks = [
+            asyncio.create_task(_login_loop(client, f"user{i}", stop, logins))
+            for i in range(concurrency)
+        ]
+        tasks.append(asyncio.create_task(_probe_loop(client, "/health", {}, stop, health)))
+        tasks.append(asyncio.create_task(_probe_loop(client, "/users/me", headers, stop, me)))
+
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    print(f"hash workers={password_hasher.max_workers} concurrent logins={concurrency} duration={duration}s")
+    print_summary("POST /token", summarize(logins))
+    print_summary("GET /health", summarize(health))
+    print_summary("GET /users/me", summarize(me))
+    password_hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    use_temp_database()
+    asyncio.run(run(args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
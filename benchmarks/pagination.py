@@ -0,0 +1,74 @@
+"""Per-page latency of offset vs keyset pagination over GET /users/ queries.
+
+    python -m benchmarks.pagination --rows 1000000 --limit 100
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import use_temp_database, seed_users, summarize
+
+PAGES = [1, 10, 100, 1_000, 10_000]
+
+
+async def _time(coro_factory, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(limit: int, repeat: int, last_page: int) -> None:
+    import sqlalchemy as sa
+
+    from core.database import AsyncSessionLocal, async_engine
+    from crud.user import get_all_users_async
+    from models.user import User, Role
+
+    async with AsyncSessionLocal() as db:
+        print(f"{'page':>8} {'offset p50':>12} {'keyset p50':>12} {'keyset+role p50':>16}")
+        for page in [p for p in PAGES if p <= last_page]:
+            skip = (page - 1) * limit
+            after_id = await db.scalar(sa.select(User.id).order_by(User.id).offset(skip - 1)) if skip else None
+            after_admin = await db.scalar(
+                sa.select(User.id).where(User.role == Role.ADMIN).order_by(User.id).offset(skip - 1)
+            ) if skip else None
+
+            offset = await _time(lambda: get_all_users_async(db, skip, limit), repeat)
+            keyset = await _time(lambda: get_all_users_async(db, 0, limit, after_id=after_id), repeat)
+            filtered = "-"
+            if not skip or after_admin is not None:
+                samples = await _time(
+                    lambda: get_all_users_async(db, 0, limit, after_id=after_admin, role=Role.ADMIN), repeat
+                )
+                filtered = f"{summarize(samples)['p50_ms']:.2f}ms"
+            db.expunge_all()
+            print(
+                f"{page:>8} {summarize(offset)['p50_ms']:>10.2f}ms {summarize(keyset)['p50_ms']:>10.2f}ms "
+                f"{filtered:>16}"
+            )
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_temp_database()
+
+    from core.database_utils import init_database
+
+    init_database(force_recreate=True)
+    started = time.perf_counter()
+    seed_users(args.rows)
+    print(f"seeded {args.rows} users in {time.perf_counter() - started:.1f}s")
+    asyncio.run(run(args.limit, args.repeat, args.rows // args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cost of resolving the authenticated user: the ORM path vs the Core principal query.
+
+    python -m benchmarks.principal_lookup
+
+Reports microseconds and peak traced allocation per lookup, and per GET /users/me
+with the principal cache off, so every request reads the user.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import use_temp_database, seed_users
+
+
+async def _orm_principal(username, db):
+    """The lookup get_current_user used to do: hydrate a User, then copy it."""
+    from core.rbac import Principal
+    from crud.user import get_user_by_username_async
+
+    user = await get_user_by_username_async(username, db)
+    return None if user is None else Principal.from_user(user)
+
+
+async def _measure(call, iterations: int) -> tuple[float, float]:
+    """Mean microseconds per call, and mean peak KiB traced during one call."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    per_call_us = (time.perf_counter() - started) / iterations * 1_000_000
+
+    peaks = 0
+    samples = max(1, iterations // 10)
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await call()
+        peaks += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return per_call_us, peaks / samples / 1024
+
+
+async def run(iterations: int, users: int) -> None:
+    import httpx
+    import crud.user
+    from core.database import AsyncReadSessionLocal
+    from core.database_utils import init_database
+    from core.rbac import principal_cache
+    from core.security import create_access_token, password_hasher
+    from main import app
+
+    init_database(force_recreate=True)
+    seed_users(users)
+    username = f"seed{users // 2}"
+
+    lookups = {"orm": _orm_principal, "core": crud.user.get_principal_by_username_async}
+    for label, lookup in lookups.items():
+        async def call():
+            async with AsyncReadSessionLocal() as db:
+                await lookup(username, db)
+
+        await call()
+        us, kib = await _measure(call, iterations)
+        print(f"lookup ({label:<4})        {us:8.1f}us/call  peak {kib:7.1f}KiB/call")
+
+    headers = {"Authorization": f"Bearer {create_access_token(data={'name': username})}"}
+    principal_cache.maxsize = 0
+    core_lookup = crud.user.get_principal_by_username_async
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, lookup in lookups.items():
+            crud.user.get_principal_by_username_async = lookup
+
+            async def call():
+                response = await client.get("/users/me", headers=headers)
+                assert response.status_code == 200, response.text
+
+            await call()
+            us, kib = await _measure(call, iterations)
+            print(f"GET /users/me ({label:<4}) {us:8.1f}us/req   peak {kib:7.1f}KiB/req")
+    crud.user.get_principal_by_username_async = core_lookup
+    password_hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+
+    use_temp_database()
+    asyncio.run(run(args.iterations, args.users))
+
+
+if __name__ == "__main__":
+    main()
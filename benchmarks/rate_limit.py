@@ -0,0 +1,83 @@
+"""Per-request cost of RateLimitMiddleware, measured against a no-op ASGI app.
+
+The 20us budget is enforced for the in-memory store; the shared SQLite store is
+reported for comparison.
+
+    python -m benchmarks.rate_limit --requests 200000 --clients 10000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import use_temp_database
+
+BUDGET_US = 20.0
+
+
+async def _noop_app(scope, receive, send):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def _per_request_us(app, scopes: list[dict]) -> float:
+    started = time.perf_counter()
+    for scope in scopes:
+        await app(scope, _receive, _send)
+    return (time.perf_counter() - started) / len(scopes) * 1_000_000
+
+
+async def run(requests: int, clients: int, store_name: str) -> bool:
+    from core.middleware import RateLimitMiddleware
+    from core.rate_limit import TokenBucketStore, SQLiteTokenBucketStore
+    from core.config import settings
+    from core.security import create_access_token
+
+    tokens = [create_access_token(data={"name": f"user{i}"}).encode() for i in range(min(clients, 1000))]
+    anon_scopes = [
+        {"type": "http", "path": "/users/me", "headers": [], "client": (f"10.0.{i // 256 % 256}.{i % 256}", 1234)}
+        for i in range(clients)
+    ]
+    auth_scopes = [
+        {"type": "http", "path": "/users/me", "headers": [(b"authorization", b"Bearer " + token)], "client": ("10.0.0.1", 1)}
+        for token in tokens
+    ]
+
+    store = TokenBucketStore() if store_name == "memory" else SQLiteTokenBucketStore(settings.SQLITE_DB_NAME + "-ratelimit")
+    # Limits high enough that every request is admitted and reaches the inner app
+    middleware = RateLimitMiddleware(_noop_app, store, 10 ** 9, 10 ** 9, 60)
+
+    ok = True
+    for label, scopes in (("anonymous", anon_scopes), ("authenticated", auth_scopes)):
+        workload = [scopes[i % len(scopes)] for i in range(requests)]
+        await _per_request_us(middleware, workload[:len(scopes)])  # warm token cache and buckets
+        baseline = await _per_request_us(_noop_app, workload)
+        limited = await _per_request_us(middleware, workload)
+        overhead = limited - baseline
+        within = overhead < BUDGET_US
+        ok = ok and within
+        print(f"{store_name:<7} {label:<14} overhead={overhead:7.2f}us/request "
+              f"({'within' if within else 'OVER'} {BUDGET_US:.0f}us budget)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    use_temp_database()
+    if not asyncio.run(run(args.requests, args.clients, args.store)) and args.store == "memory":
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
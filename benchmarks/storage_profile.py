@@ -0,0 +1,94 @@
+"""Read and write throughput of the tuned SQLite storage profile against SQLite defaults.
+
+    python -m benchmarks.storage_profile --readers 32 --writers 8 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.common import use_temp_database, seed_users, summarize, print_summary
+
+
+async def _reader(stop: asyncio.Event, rows: int, latencies: list[float], errors: list[str]):
+    from core.database import AsyncReadSessionLocal
+    from crud.user import get_user_by_id_async
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            async with AsyncReadSessionLocal() as db:
+                await get_user_by_id_async(random.randint(1, rows), db)
+        except Exception as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def _writer(stop: asyncio.Event, rows: int, latencies: list[float], errors: list[str]):
+    from core.database import AsyncSessionLocal
+    from crud.user import update_user_status_async
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                await update_user_status_async(random.randint(1, rows), random.random() < 0.5, db)
+        except Exception as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(rows: int, readers: int, writers: int, duration: float) -> None:
+    from core.database import describe_storage_profile, dispose_engines
+
+    profile = await describe_storage_profile()
+    stop = asyncio.Event()
+    reads, writes, errors = [], [], []
+    tasks = [asyncio.create_task(_reader(stop, rows, reads, errors)) for _ in range(readers)]
+    tasks += [asyncio.create_task(_writer(stop, rows, writes, errors)) for _ in range(writers)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    await dispose_engines()
+
+    print(f"profile={profile['profile']} journal_mode={profile['journal_mode']} synchronous={profile['synchronous']}")
+    print(f"  reads/s={len(reads) / duration:10.1f}  writes/s={len(writes) / duration:10.1f}  errors={len(errors)}")
+    print_summary("  read latency", summarize(reads))
+    print_summary("  write latency", summarize(writes))
+    if errors:
+        print(f"  error types: {sorted(set(errors))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--profile", choices=["default", "tuned"], help="run a single profile in this process")
+    args = parser.parse_args()
+
+    if args.profile is None:
+        # Settings are read at import time, so each profile runs in a fresh interpreter
+        for profile in ("default", "tuned"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.storage_profile", *sys.argv[1:], "--profile", profile],
+                check=True,
+            )
+        return
+
+    os.environ["SQLITE_STORAGE_PROFILE"] = args.profile
+    use_temp_database()
+
+    from core.database_utils import init_database
+
+    init_database(force_recreate=True)
+    seed_users(args.rows)
+    asyncio.run(run(args.rows, args.readers, args.writers, args.duration))
+
+
+if __name__ == "__main__":
+    main()
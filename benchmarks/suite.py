@@ -0,0 +1,240 @@
+"""End-to-end benchmark of the API hot paths, driven in-process through ASGI.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare results.json --threshold 0.15
+
+Each scenario (login, token refresh, lookups, listings, mutations) reports throughput, p50/p95/p99 latency and the peak memory
+allocated while serving one request (tracemalloc, measured in a separate pass).
+With --compare, a scenario regresses when its p95 or throughput is worse than
+the baseline by more than the threshold, and the run exits non-zero.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.common import use_temp_database, seed_users, summarize
+
+PASSWORD = "password"
+
+
+async def _login(client, username: str) -> dict:
+    response = await client.post("/token", data={"username": username, "password": PASSWORD})
+    return response.json()
+
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def _scenarios(rows: int, admin: dict, user: dict, refresh_tokens: collections.deque) -> dict:
+    """name -> (relative iteration weight, request factory taking the iteration number)."""
+    def token(client, i):
+        return client.post("/token", data={"username": "bench-user", "password": PASSWORD})
+
+    async def refresh(client, i):
+        # Independent rotation chains, so concurrent workers never present the same token
+        response = await client.post("/token/refresh", json={"refresh_token": refresh_tokens.popleft()})
+        refresh_tokens.append(response.json()["refresh_token"])
+        return response
+
+    def register(client, i):
+        return client.post("/users/user", json={
+            "email": f"register{i}-{time.monotonic_ns()}@example.com",
+            "username": f"register{i}-{time.monotonic_ns()}",
+            "password": PASSWORD,
+        })
+
+    def users_me(client, i):
+        return client.get("/users/me", headers=user)
+
+    def list_users_at(skip):
+        def list_users(client, i):
+            return client.get("/users/", params={"skip": skip, "limit": 100}, headers=admin)
+        return list_users
+
+    def list_privileged_users(client, i):
+        # The seeder grants update:user as an extra to a small share of users
+        return client.get("/users/", params={"permission": "update:user", "limit": 100}, headers=admin)
+
+    def get_user(client, i):
+        return client.get(f"/users/{i % rows + 1}", headers=admin)
+
+    def lookup_users(client, i):
+        start = (i * 200) % max(rows - 200, 1)
+        return client.get("/users/lookup", params=[("id", start + n + 1) for n in range(200)], headers=admin)
+
+    def update_role(client, i):
+        return client.patch(f"/users/{i % rows + 1}/role", params={"role": "manager" if i % 2 else "user"}, headers=admin)
+
+    def add_permission(client, i):
+        return client.post(f"/users/{i % rows + 1}/permissions/add", params={"permission": "view:metrics"}, headers=admin)
+
+    def remove_permission(client, i):
+        return client.post(f"/users/{i % rows + 1}/permissions/remove", params={"permission": "view:metrics"}, headers=admin)
+
+    scenarios = {
+        "token": (0.02, token),
+        "refresh": (0.5, refresh),
+        "register": (0.02, register),
+        "users_me": (1.0, users_me),
+        "get_user": (1.0, get_user),
+        "lookup_200_users": (0.2, lookup_users),
+        "list_users_with_permission": (0.2, list_privileged_users),
+        "update_role": (0.5, update_role),
+        "add_permission": (0.5, add_permission),
+        "remove_permission": (0.5, remove_permission),
+    }
+    for skip in (0, 1_000, 10_000, 100_000):
+        if skip < rows:
+            scenarios[f"list_users_skip_{skip}"] = (0.2, list_users_at(skip))
+    return scenarios
+
+
+async def _run_scenario(client, request, iterations: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    # Allocation pass, sequential so the peak belongs to a single request
+    samples = min(iterations, 50)
+    peaks = []
+    tracemalloc.start()
+    for i in range(samples):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await request(client, iterations + i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    result = summarize(latencies)
+    result["throughput_rps"] = iterations / elapsed
+    result["errors"] = errors
+    result["peak_alloc_kib"] = sum(peaks) / len(peaks) / 1024
+    return result
+
+
+async def run(rows: int, iterations: int, concurrency: int, only: list[str] | None) -> dict:
+    import httpx
+
+    from core.security import password_hasher
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/users/user", json={
+            "email": "bench-admin@example.com", "username": "bench-admin", "password": PASSWORD, "role": "admin",
+        })
+        await client.post("/users/user", json={
+            "email": "bench-user@example.com", "username": "bench-user", "password": PASSWORD,
+        })
+        admin = _bearer(await _login(client, "bench-admin"))
+        user = _bearer(await _login(client, "bench-user"))
+        refresh_tokens = collections.deque(
+            [(await _login(client, "bench-user"))["refresh_token"] for _ in range(concurrency)]
+        )
+
+        for name, (weight, request) in _scenarios(rows, admin, user, refresh_tokens).items():
+            if only and name not in only:
+                continue
+            count = max(10, int(iterations * weight))
+            for i in range(min(count, 20)):
+                await request(client, -i - 1)
+            results[name] = await _run_scenario(client, request, count, concurrency)
+            r = results[name]
+            print(f"{name:<26} {r['throughput_rps']:9.1f} req/s  p50={r['p50_ms']:8.2f}ms  p95={r['p95_ms']:8.2f}ms  "
+                  f"p99={r['p99_ms']:8.2f}ms  alloc={r['peak_alloc_kib']:8.1f}KiB  errors={r['errors']}")
+
+    password_hasher.shutdown()
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Scenarios whose p95 or throughput regressed by more than ``threshold``."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="users seeded before the run")
+    parser.add_argument("--iterations", type=int, default=2_000, help="requests for the heaviest-weighted scenarios")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenario", action="append", help="run only these scenarios")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    use_temp_database()
+
+    from core.database_utils import init_database
+
+    init_database(force_recreate=True)
+    seed_users(args.rows)
+    results = asyncio.run(run(args.rows, args.iterations, args.concurrency, args.scenario))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "rows": args.rows,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
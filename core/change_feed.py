@@ -0,0 +1,31 @@
+import asyncio
+
+
+class ChangeNotifier:
+    """Wakes long-polling change-feed requests when this worker commits a user change.
+
+    Only covers the local worker; waiters re-check the table at least every
+    CHANGE_FEED_POLL_SECONDS to pick up changes written by other workers.
+    Event-loop only; ``notify`` is a no-op when nothing is waiting.
+    """
+
+    def __init__(self):
+        self._event: asyncio.Event | None = None
+
+    def notify(self) -> None:
+        if self._event is not None:
+            self._event.set()
+            self._event = None
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the next notification; False on timeout."""
+        if self._event is None:
+            self._event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+user_changes = ChangeNotifier()
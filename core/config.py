@@ -13,12 +13,73 @@ class Settings(BaseSettings):
     SQLITE_URI: str = os.getenv("SQLITE_URI", "")
     SQLITE_DB_NAME: str = os.getenv("SQLITE_DB_NAME", "db_sqlite")
 
+    # "tuned": WAL + pragmas below, one writer connection and a pool of readers.
+    # "default": SQLite defaults and a single shared pool, as before.
+    SQLITE_STORAGE_PROFILE: str = os.getenv("SQLITE_STORAGE_PROFILE", "tuned")
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_CACHE_SIZE_KIB: int = int(os.getenv("SQLITE_CACHE_SIZE_KIB", 64 * 1024))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_READ_POOL_SIZE: int = int(os.getenv("SQLITE_READ_POOL_SIZE", 8))
+
     SECRET_KEY: str = os.getenv("SECRET_KEY", "secret")
-    ALGORITHM: str = "HS256"
+    # HS256 signs with SECRET_KEY; RS256 signs with the keys in JWT_KEYS_DIR (see core.jwt_keys)
+    ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
+    JWT_KEYS_DIR: str = os.getenv("JWT_KEYS_DIR", "jwt_keys")
+    JWT_ACTIVE_KID: str = os.getenv("JWT_ACTIVE_KID", "")
+    JWKS_MAX_AGE_SECONDS: int = int(os.getenv("JWKS_MAX_AGE_SECONDS", 300))
+    # Put role and permission mask claims in access tokens, so permission-only checks (here and
+    # in services verifying against the JWKS) skip the user lookup. Changing a user's role,
+    # permissions or status then revokes their access tokens so clients refresh into new claims.
+    JWT_EMBED_PERMISSIONS: bool = os.getenv("JWT_EMBED_PERMISSIONS", "false").lower() == "true"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
     REFRESH_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 60 * 24 * 7))
 
+    # Verified access tokens kept per worker; 0 verifies the signature on every request
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10_000))
+
+    # Argon2 worker processes; 0 hashes inline on the event loop
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+    # Logins waiting for a hashing worker before /token sheds load with 503
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+
+    # Failed-login backoff: after the free attempts each failure doubles the block, starting at
+    # the base delay; records are forgotten after the reset window without failures
+    LOGIN_GUARD_MAX_ENTRIES: int = int(os.getenv("LOGIN_GUARD_MAX_ENTRIES", 100_000))
+    LOGIN_GUARD_USER_FREE_ATTEMPTS: int = int(os.getenv("LOGIN_GUARD_USER_FREE_ATTEMPTS", 5))
+    LOGIN_GUARD_IP_FREE_ATTEMPTS: int = int(os.getenv("LOGIN_GUARD_IP_FREE_ATTEMPTS", 20))
+    LOGIN_GUARD_BASE_DELAY_SECONDS: float = float(os.getenv("LOGIN_GUARD_BASE_DELAY_SECONDS", 1))
+    LOGIN_GUARD_MAX_DELAY_SECONDS: float = float(os.getenv("LOGIN_GUARD_MAX_DELAY_SECONDS", 15 * 60))
+    LOGIN_GUARD_RESET_SECONDS: float = float(os.getenv("LOGIN_GUARD_RESET_SECONDS", 15 * 60))
+
+    # How often each worker picks up revocations made elsewhere, and prunes expired ones
+    REVOCATION_RELOAD_SECONDS: float = float(os.getenv("REVOCATION_RELOAD_SECONDS", 1))
+    REVOCATION_PRUNE_SECONDS: float = float(os.getenv("REVOCATION_PRUNE_SECONDS", 60))
+
+    # Argon2 cost for new hashes, memory in KiB; pick values with `python -m core.password_calibration`.
+    # Stored hashes with other parameters are rehashed on the next successful login.
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", 3))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", 64 * 1024))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+    # Records hashed, checked and inserted together by the bulk import endpoint
+    USER_IMPORT_BATCH_SIZE: int = int(os.getenv("USER_IMPORT_BATCH_SIZE", 500))
+
+    # Most ids plus usernames one /users/lookup call may resolve
+    USER_LOOKUP_MAX_ITEMS: int = int(os.getenv("USER_LOOKUP_MAX_ITEMS", 200))
+
+    # /users/changes: longest long-poll a client may ask for, and how often a waiting
+    # request re-checks the table for changes committed by other workers
+    CHANGE_FEED_MAX_WAIT_SECONDS: int = int(os.getenv("CHANGE_FEED_MAX_WAIT_SECONDS", 30))
+    CHANGE_FEED_POLL_SECONDS: float = float(os.getenv("CHANGE_FEED_POLL_SECONDS", 1))
+
+    # Per-worker cache of authenticated users; the TTL bounds staleness across workers
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 10_000))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 30))
+
     CORS_ALLOW_CREDENTIALS: bool = True
     CORS_ALLOW_METHODS: list[str] = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     CORS_ALLOW_HEADERS: list[str] = ["*"]
@@ -27,6 +88,12 @@ class Settings(BaseSettings):
     RATE_LIMIT_ANON_REQUESTS: int = Field(default=30)
     RATE_LIMIT_AUTH_REQUESTS: int = Field(default=100)
     RATE_LIMIT_WINDOW_SECONDS: int = Field(default=60)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # "memory" limits each worker separately; "sqlite" shares buckets between a few workers on one host
+    # (every check takes the file's write lock, so it is no substitute for a shared store across hosts)
+    RATE_LIMIT_STORAGE: str = os.getenv("RATE_LIMIT_STORAGE", "memory")
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "")
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = ["/health"]
 
     # SSL_KEYFILE: str = os.getenv("SSL_KEYFILE")
     # SSL_CERTFILE: str = os.getenv("SSL_CERTFILE")
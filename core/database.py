@@ -1,13 +1,63 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
+from core.metrics import instrument_engine
+
+TUNED_PROFILE = settings.SQLITE_STORAGE_PROFILE == "tuned"
+
+SQLITE_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": settings.SQLITE_JOURNAL_MODE,
+    "synchronous": settings.SQLITE_SYNCHRONOUS,
+    "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": -settings.SQLITE_CACHE_SIZE_KIB,
+    "mmap_size": settings.SQLITE_MMAP_SIZE,
+    "temp_store": "MEMORY",
+} if TUNED_PROFILE else {}
+
+
+def _set_pragmas(pragmas: dict[str, str | int]):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return on_connect
+
 
 engine = create_engine(
     f"sqlite:///{settings.SQLITE_DB_NAME}",
     connect_args={"check_same_thread": False}
 )
+event.listen(engine, "connect", _set_pragmas(SQLITE_PRAGMAS))
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+
+if TUNED_PROFILE:
+    # SQLite allows one writer at a time; queue writers on a single connection instead of
+    # letting them fight over the file lock, and serve reads from their own pool.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{settings.SQLITE_DB_NAME}", pool_size=1, max_overflow=0
+    )
+    async_read_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{settings.SQLITE_DB_NAME}",
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+    event.listen(async_engine.sync_engine, "connect", _set_pragmas(SQLITE_PRAGMAS))
+    event.listen(async_read_engine.sync_engine, "connect", _set_pragmas({**SQLITE_PRAGMAS, "query_only": "ON"}))
+else:
+    async_engine = async_read_engine = create_async_engine(f"sqlite+aiosqlite:///{settings.SQLITE_DB_NAME}")
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "writer")
+if async_read_engine is not async_engine:
+    instrument_engine(async_read_engine.sync_engine, "reader")
+
+# expire_on_commit=False: attribute access after commit must not trigger lazy IO
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -18,3 +68,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Session on the writer connection. Don't hold it open across slow awaits."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Session on the read-only pool."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def describe_storage_profile() -> dict[str, str | int]:
+    """Pragmas as actually reported by a read connection, for the startup log."""
+    profile: dict[str, str | int] = {
+        "profile": settings.SQLITE_STORAGE_PROFILE,
+        "read_pool_size": async_read_engine.pool.size() if TUNED_PROFILE else 0,
+    }
+    async with async_read_engine.connect() as conn:
+        for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size"):
+            profile[name] = (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+    return profile
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    """Connection pool occupancy per async engine."""
+    engines = {"writer": async_engine}
+    if async_read_engine is not async_engine:
+        engines["reader"] = async_read_engine
+    return {
+        name: {"size": engine.pool.size(), "checked_out": engine.pool.checkedout(), "checked_in": engine.pool.checkedin()}
+        for name, engine in engines.items()
+    }
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
@@ -0,0 +1,128 @@
+"""Bulk-generate synthetic users for benchmarking.
+
+    python -m core.database_seed --users 1000000 --seed 42
+
+Rows go straight to SQLite in large transactions with durability relaxed and the
+secondary indexes dropped, which are rebuilt once at the end. Output is
+deterministic for a given seed and starting table size. User ``seed<n>`` has the
+password ``passwords[n % len(passwords)]``. Each row gets its own change-feed
+version, above any version already handed out.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy.schema import CreateIndex
+
+from core.database import engine
+from core.rbac import permission_mask
+from core.security import get_password_hash
+from models.user import NEXT_ROW_VERSION, User, Role
+from schemas.user import Permission
+
+DEFAULT_PASSWORDS = ("password", "password1", "password2", "password3")
+
+# Cumulative thresholds: (upper bound, role)
+ROLE_DISTRIBUTION = ((0.03, Role.ADMIN), (0.15, Role.MANAGER), (1.0, Role.USER))
+
+# Per role: (cumulative upper bound, permissions granted on top of the role)
+EXTRA_PERMISSIONS = {
+    Role.ADMIN: (),
+    Role.MANAGER: ((0.20, [Permission.UPDATE_USER]),),
+    Role.USER: ((0.10, [Permission.READ_USER]), (0.12, [Permission.READ_USER, Permission.UPDATE_USER])),
+}
+
+DISABLED_RATIO = 0.02
+
+# Only ever applied to the seeding connection, never to the app's engines
+BULK_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -256 * 1024,
+}
+
+INSERT_SQL = (
+    "INSERT INTO users (email, username, password_hash, role, permission_bits, disabled, row_version, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _rows(start: int, count: int, rng: random.Random, hashes: list[str], first_version: int):
+    extras = {
+        role: [(bound, permission_mask(permissions)) for bound, permissions in options]
+        for role, options in EXTRA_PERMISSIONS.items()
+    }
+    now = time.time()
+    for n in range(start, start + count):
+        draw = rng.random()
+        role = next(role for bound, role in ROLE_DISTRIBUTION if draw < bound)
+        draw = rng.random()
+        permissions = next((mask for bound, mask in extras[role] if draw < bound), 0)
+        yield (
+            f"seed{n}@example.com",
+            f"seed{n}",
+            hashes[n % len(hashes)],
+            role.name,
+            permissions,
+            rng.random() < DISABLED_RATIO,
+            first_version + n - start,
+            now,
+        )
+
+
+def seed_users(
+    count: int,
+    *,
+    seed: int = 0,
+    passwords: tuple[str, ...] = DEFAULT_PASSWORDS,
+    batch_size: int = 100_000,
+) -> int:
+    """Append ``count`` synthetic users and return the number inserted."""
+    rng = random.Random(seed)
+    hashes = [get_password_hash(password) for password in passwords]
+    indexes = list(User.__table__.indexes)
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        previous = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_PRAGMAS}
+        for name, value in BULK_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
+        start = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+        first_version = cursor.execute(f"SELECT {NEXT_ROW_VERSION.text}").fetchone()[0]
+        for index in indexes:
+            cursor.execute(f"DROP INDEX IF EXISTS {index.name}")
+        connection.commit()
+
+        rows = _rows(start, count, rng, hashes, first_version)
+        for _ in range(0, count, batch_size):
+            cursor.executemany(INSERT_SQL, (row for _, row in zip(range(batch_size), rows)))
+            connection.commit()
+
+        for index in indexes:
+            cursor.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+        cursor.execute("ANALYZE users")
+        connection.commit()
+
+        for name, value in previous.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    finally:
+        connection.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Insert synthetic users for benchmarking.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from core.database_utils import init_database
+
+    init_database()
+    started = time.perf_counter()
+    seed_users(args.users, seed=args.seed, batch_size=args.batch_size)
+    print(f"Inserted {args.users} users in {time.perf_counter() - started:.1f}s")
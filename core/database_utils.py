@@ -2,8 +2,11 @@ import sqlalchemy as sa
 from sqlalchemy.exc import SQLAlchemyError
 
 from core.database import engine, Base
+from core.rbac import PERMISSION_BITS
 
-from models.user import User
+from models.user import User, UserTombstone
+from models.refresh_token import RefreshToken
+from models.revoked_token import RevokedToken
 
 
 def init_db():
@@ -12,6 +15,40 @@ def init_db():
     Base.metadata.create_all(bind=engine)
 
 
+def add_missing_columns():
+    """Add User columns introduced after the database already existed.
+
+    Existing rows get row_version = id so the change feed still returns them in
+    insertion order to a client starting from zero. The JSON permissions column is
+    replaced by permission_bits.
+    """
+    columns = {column["name"] for column in sa.inspect(engine).get_columns(User.__tablename__)}
+    with engine.begin() as conn:
+        if "row_version" not in columns:
+            conn.execute(sa.text("ALTER TABLE users ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(sa.text("UPDATE users SET row_version = id"))
+        if "updated_at" not in columns:
+            conn.execute(sa.text("ALTER TABLE users ADD COLUMN updated_at FLOAT"))
+        if "permission_bits" not in columns:
+            # Fold the old JSON permissions array into the bitmask, then drop it (SQLite >= 3.35)
+            bits = " ".join(f"WHEN '{permission.value}' THEN {bit}" for permission, bit in PERMISSION_BITS.items())
+            conn.execute(sa.text("ALTER TABLE users ADD COLUMN permission_bits INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(sa.text(
+                "UPDATE users SET permission_bits = (SELECT coalesce(sum(bit), 0) FROM "
+                f"(SELECT DISTINCT CASE value {bits} END AS bit FROM json_each(users.permissions)))"
+            ))
+            conn.execute(sa.text("ALTER TABLE users DROP COLUMN permissions"))
+
+
+def ensure_indexes():
+    """Create tables, columns and indexes added to the models after the database already existed."""
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def check_connection():
     try:
         with engine.connect() as conn:
@@ -40,6 +77,7 @@ def init_database(force_recreate=False):
             Base.metadata.drop_all(bind=engine)
         else:
             print("Database already exists. Use force_recreate=True to drop and recreate.")
+            ensure_indexes()
             return False
     print("Creating database tables...")
     init_db()
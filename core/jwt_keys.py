@@ -0,0 +1,94 @@
+"""JWT signing keys.
+
+With ALGORITHM=HS256 (the default) tokens are signed with SECRET_KEY. With RS256,
+every ``<kid>.pem`` RSA private key in JWT_KEYS_DIR is loaded: the active key
+(JWT_ACTIVE_KID, or the last kid in sort order) signs, and all of them verify and
+are published at /.well-known/jwks.json. To rotate, generate a key, deploy it
+while JWT_ACTIVE_KID still names the old one so downstream JWKS caches pick it
+up, then activate it. Remove the old file once its tokens have expired.
+
+    python -m core.jwt_keys generate
+"""
+import argparse
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from jose import jwk
+from jose.exceptions import JWTError
+
+from core.config import settings
+
+
+class KeyRing:
+    def __init__(self, algorithm: str, secret: str, keys_dir: str, active_kid: str):
+        self.algorithm = algorithm
+        self._secret = secret
+        self._private: dict[str, Any] = {}
+        self._public: dict[str, Any] = {}
+        self._active_kid: str | None = None
+
+        if algorithm.startswith("HS"):
+            return
+
+        if os.path.isdir(keys_dir):
+            for filename in sorted(os.listdir(keys_dir)):
+                kid, extension = os.path.splitext(filename)
+                if extension != ".pem":
+                    continue
+                with open(os.path.join(keys_dir, filename)) as f:
+                    key = jwk.construct(f.read(), algorithm)
+                self._private[kid] = key
+                self._public[kid] = key.public_key()
+        if not self._private:
+            raise RuntimeError(f"{algorithm} needs at least one <kid>.pem key in JWT_KEYS_DIR ({keys_dir!r})")
+
+        self._active_kid = active_kid or max(self._private)
+        if self._active_kid not in self._private:
+            raise RuntimeError(f"JWT_ACTIVE_KID {self._active_kid!r} has no key in {keys_dir!r}")
+
+    def signing_key(self) -> tuple[str | None, Any]:
+        """The kid to put in the header (None for HS256) and the key to sign with."""
+        if self._active_kid is None:
+            return None, self._secret
+        return self._active_kid, self._private[self._active_kid]
+
+    def verification_key(self, kid: str | None) -> Any:
+        if self._active_kid is None:
+            return self._secret
+        key = self._public.get(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return key
+
+    def jwks(self) -> dict:
+        """Public keys as a JWK Set; empty for shared-secret algorithms."""
+        keys = []
+        for kid, key in self._public.items():
+            jwk_dict = key.to_dict()
+            jwk_dict.update(kid=kid, use="sig", alg=self.algorithm)
+            keys.append(jwk_dict)
+        return {"keys": keys}
+
+
+def generate_key(keys_dir: str, bits: int = 2048) -> str:
+    """Write a new RSA private key to ``keys_dir`` and return its kid."""
+    import rsa  # installed with python-jose
+
+    os.makedirs(keys_dir, exist_ok=True)
+    kid = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    _, private_key = rsa.newkeys(bits)
+    path = os.path.join(keys_dir, f"{kid}.pem")
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        f.write(private_key.save_pkcs1())
+    return kid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage RS256 signing keys.")
+    parser.add_argument("command", choices=["generate"])
+    parser.add_argument("--keys-dir", default=settings.JWT_KEYS_DIR)
+    parser.add_argument("--bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    print(generate_key(args.keys_dir, args.bits))
@@ -0,0 +1,74 @@
+import time
+
+from core.cache import TTLCache
+from core.config import settings
+
+
+class LoginGuard:
+    """Per-username and per-IP failed-login tracking with exponential backoff.
+
+    Each key holds ``(failures, blocked_until)`` in an LRU-bounded TTL cache, so
+    records disappear once a key has been quiet for the reset window. After the
+    free attempts, every further failure blocks the key for twice as long as the
+    previous one, up to ``max_delay``. Event-loop only, like TTLCache.
+    """
+
+    def __init__(
+            self,
+            max_entries: int,
+            user_free_attempts: int,
+            ip_free_attempts: int,
+            base_delay: float,
+            max_delay: float,
+            reset_seconds: float,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.reset_seconds = reset_seconds
+        # Separate caches, so spraying many usernames can't evict the per-IP records
+        self._users = TTLCache(max_entries, reset_seconds)
+        self._ips = TTLCache(max_entries, reset_seconds)
+        self.user_free_attempts = user_free_attempts
+        self.ip_free_attempts = ip_free_attempts
+
+    def _trackers(self, username: str, ip: str | None):
+        yield self._users, username, self.user_free_attempts
+        if ip is not None:
+            yield self._ips, ip, self.ip_free_attempts
+
+    def retry_after(self, username: str, ip: str | None, now: float | None = None) -> float:
+        """Seconds until another attempt is allowed for this username and IP; 0 if allowed now."""
+        now = time.monotonic() if now is None else now
+        wait = 0.0
+        for cache, key, _ in self._trackers(username, ip):
+            record = cache.get(key)
+            if record is not None:
+                wait = max(wait, record[1] - now)
+        return wait
+
+    def record_failure(self, username: str, ip: str | None, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        for cache, key, free_attempts in self._trackers(username, ip):
+            failures, _ = cache.get(key) or (0, 0.0)
+            failures += 1
+            excess = failures - free_attempts
+            delay = min(self.max_delay, self.base_delay * 2 ** min(excess - 1, 32)) if excess > 0 else 0.0
+            cache.set(key, (failures, now + delay), ttl=self.reset_seconds + delay)
+
+    def record_success(self, username: str) -> None:
+        """Forget the username's failures. The IP keeps its record, so one valid
+        account can't be used to reset a credential-stuffing source."""
+        self._users.pop(username)
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked_usernames": len(self._users), "tracked_ips": len(self._ips)}
+
+
+login_guard = LoginGuard(
+    max_entries=settings.LOGIN_GUARD_MAX_ENTRIES,
+    user_free_attempts=settings.LOGIN_GUARD_USER_FREE_ATTEMPTS,
+    ip_free_attempts=settings.LOGIN_GUARD_IP_FREE_ATTEMPTS,
+    base_delay=settings.LOGIN_GUARD_BASE_DELAY_SECONDS,
+    max_delay=settings.LOGIN_GUARD_MAX_DELAY_SECONDS,
+    reset_seconds=settings.LOGIN_GUARD_RESET_SECONDS,
+)
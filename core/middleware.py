@@ -0,0 +1,105 @@
+import math
+import time
+
+from fastapi import FastAPI
+from jose import JWTError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import settings
+from core.metrics import MetricsMiddleware
+from core.rate_limit import TokenBucketStore, SQLiteTokenBucketStore
+from core.security import decode_access_token
+
+# How often one shard of idle buckets is swept
+EVICTION_INTERVAL_SECONDS = 1.0
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting keyed on the token subject, or the client IP for anonymous requests.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware to keep the per-request cost
+    to a header scan, a cached token lookup and one bucket update.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            store: TokenBucketStore | SQLiteTokenBucketStore,
+            anon_requests: int,
+            auth_requests: int,
+            window_seconds: int,
+            exempt_paths: list[str] = (),
+    ):
+        self.app = app
+        self.store = store
+        self.anon_requests = anon_requests
+        self.auth_requests = auth_requests
+        self.anon_rate = anon_requests / window_seconds
+        self.auth_rate = auth_requests / window_seconds
+        # An idle bucket refills completely within one window
+        self.idle_seconds = window_seconds
+        self.exempt_paths = frozenset(exempt_paths)
+        self._next_eviction = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        subject = self._token_subject(scope)
+        if subject is not None:
+            retry_after = await self.store.hit("user:" + subject, self.auth_requests, self.auth_rate, now)
+        else:
+            client = scope.get("client")
+            retry_after = await self.store.hit("ip:" + (client[0] if client else ""), self.anon_requests, self.anon_rate, now)
+
+        if now >= self._next_eviction:
+            self._next_eviction = now + EVICTION_INTERVAL_SECONDS
+            await self.store.evict_idle(self.idle_seconds, now)
+
+        if retry_after:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _token_subject(scope: Scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    # Only verified subjects get the authenticated limit, or anyone could mint keys
+                    return decode_access_token(token).get("name")
+                except JWTError:
+                    return None
+        return None
+
+
+def create_rate_limit_store() -> TokenBucketStore | SQLiteTokenBucketStore:
+    if settings.RATE_LIMIT_STORAGE == "sqlite":
+        return SQLiteTokenBucketStore(settings.RATE_LIMIT_SQLITE_PATH or f"{settings.SQLITE_DB_NAME}-ratelimit")
+    return TokenBucketStore()
+
+
+def add_middleware(app: FastAPI) -> None:
+    # Added first, so it sits inside MetricsMiddleware and rejected requests are still counted
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware,
+            store=create_rate_limit_store(),
+            anon_requests=settings.RATE_LIMIT_ANON_REQUESTS,
+            auth_requests=settings.RATE_LIMIT_AUTH_REQUESTS,
+            window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+            exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS,
+        )
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,69 @@
+"""Pick Argon2 parameters that fit a per-hash latency budget on this host.
+
+    python -m core.password_calibration --target-ms 250
+
+Memory cost is what makes Argon2 expensive for attackers, so the search keeps as
+much of it as the budget allows (halving from --max-memory-mib while a single pass
+is over budget), then raises the time cost while hashes stay within budget. The
+result is printed as settings for the environment.
+"""
+import argparse
+import statistics
+import time
+
+from passlib.hash import argon2
+
+MIN_MEMORY_KIB = 19 * 1024  # OWASP floor for Argon2id
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, samples: int = 3) -> float:
+    """Median seconds to hash one password with the given parameters."""
+    handler = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration-password")
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def calibrate(target_seconds: float, max_memory_kib: int, parallelism: int, samples: int = 3) -> dict[str, int | float]:
+    """Return the strongest parameters whose measured hash time fits ``target_seconds``."""
+    memory_cost = max_memory_kib
+    elapsed = measure(1, memory_cost, parallelism, samples)
+    while elapsed > target_seconds and memory_cost // 2 >= MIN_MEMORY_KIB:
+        memory_cost //= 2
+        elapsed = measure(1, memory_cost, parallelism, samples)
+
+    time_cost = 1
+    while True:
+        candidate = measure(time_cost + 1, memory_cost, parallelism, samples)
+        if candidate > target_seconds:
+            break
+        time_cost += 1
+        elapsed = candidate
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "elapsed_ms": elapsed * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate Argon2 parameters for a latency budget.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="hash time budget per login")
+    parser.add_argument("--max-memory-mib", type=int, default=64)
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per candidate")
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms / 1000, args.max_memory_mib * 1024, args.parallelism, args.samples)
+    if result["elapsed_ms"] > args.target_ms:
+        print(f"# Even the cheapest candidate takes {result['elapsed_ms']:.0f}ms, over the {args.target_ms:.0f}ms budget")
+    else:
+        print(f"# {result['elapsed_ms']:.0f}ms per hash, budget {args.target_ms:.0f}ms")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
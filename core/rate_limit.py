@@ -0,0 +1,113 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucketStore:
+    """In-memory token buckets, sharded so idle keys can be evicted a slice at a time.
+
+    Each bucket is ``[tokens, updated_at]``. A bucket that has been idle long enough
+    to refill completely is indistinguishable from a new one, so evicting it is free.
+    Not thread-safe; it is meant to be used from the event loop only. The methods are
+    coroutines only to share an interface with SQLiteTokenBucketStore; they never wait.
+    """
+
+    def __init__(self, shards: int = 64):
+        self._shards: list[dict[str, list[float]]] = [{} for _ in range(shards)]
+        self._next_shard = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    async def hit(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        """Take one token. Returns 0 if allowed, otherwise seconds until a token is available."""
+        shard = self._shards[hash(key) % len(self._shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            shard[key] = [capacity - 1, now]
+            return 0.0
+
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / refill_per_second
+
+    async def evict_idle(self, idle_seconds: float, now: float) -> int:
+        """Drop buckets untouched for ``idle_seconds`` from the next shard in turn."""
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) % len(self._shards)
+        idle = [key for key, (_, updated_at) in shard.items() if now - updated_at >= idle_seconds]
+        for key in idle:
+            del shard[key]
+        return len(idle)
+
+
+class SQLiteTokenBucketStore:
+    """Token buckets in a SQLite file, so every worker on the host shares the same limits.
+
+    Each check is a single UPSERT ... RETURNING on an autocommit connection, run on
+    the store's own thread so a write waiting on the file lock never blocks the event
+    loop. Every check from every worker still serializes on that one write lock, so
+    it suits a few workers on one host. It costs far more per request than the
+    in-memory store and does not share limits across hosts.
+    """
+
+    _HIT = """
+        INSERT INTO rate_limit_buckets (key, tokens, updated_at, allowed)
+        VALUES (:key, :capacity - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN MIN(:capacity, tokens + (:now - updated_at) * :rate) >= 1
+                          THEN MIN(:capacity, tokens + (:now - updated_at) * :rate) - 1
+                          ELSE MIN(:capacity, tokens + (:now - updated_at) * :rate) END,
+            allowed = MIN(:capacity, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now
+        RETURNING tokens, allowed
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 50):
+        # One thread owns the connection, which also keeps its statements in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit")
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Limits are soft state; losing the last few updates on a crash is fine
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, allowed INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
+
+    async def hit(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        """Take one token. Returns 0 if allowed, otherwise seconds until a token is available."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._hit, key, capacity, refill_per_second, now)
+
+    async def evict_idle(self, idle_seconds: float, now: float) -> int:
+        """Drop buckets untouched for ``idle_seconds``."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._evict_idle, idle_seconds, now)
+
+    def _hit(self, key: str, capacity: int, refill_per_second: float, now: float) -> float:
+        try:
+            tokens, allowed = self._conn.execute(
+                self._HIT, {"key": key, "capacity": capacity, "rate": refill_per_second, "now": now}
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Fail open: a locked limiter database must not take the API down with it
+            return 0.0
+        return 0.0 if allowed else (1 - tokens) / refill_per_second
+
+    def _evict_idle(self, idle_seconds: float, now: float) -> int:
+        try:
+            return self._conn.execute(
+                "DELETE FROM rate_limit_buckets WHERE updated_at <= ?", (now - idle_seconds,)
+            ).rowcount
+        except sqlite3.OperationalError:
+            return 0
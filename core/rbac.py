@@ -1,11 +1,17 @@
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
-from jose import jwt
 from jose.exceptions import JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import TTLCache
 from core.config import settings
-from core.database import get_db
-from core.security import oauth2_scheme
+from core.database import get_async_read_db
+from core.metrics import auth_failures
+from core.security import oauth2_scheme, decode_access_token
 from schemas.token import TokenData
 from schemas.user import Role, Permission, User
 
@@ -30,6 +36,131 @@ ROLE_PERMISSIONS: dict[Role, list[Permission]] = {
     ]
 }
 
+# One bit per permission, in declaration order. Stored in users.permission_bits, so new
+# permissions must be appended to the enum. Permission is a str enum, so plain strings
+# look up the same entries.
+PERMISSION_BITS: dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+
+
+def permission_mask(permissions: Iterable[Permission | str]) -> int:
+    """Fold a collection of permissions into a bitmask."""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+def permissions_from_mask(mask: int) -> tuple[Permission, ...]:
+    """The permissions set in a bitmask, in declaration order."""
+    return tuple(permission for permission, bit in PERMISSION_BITS.items() if mask & bit)
+
+
+ROLE_PERMISSION_MASKS: dict[Role, int] = {
+    role: permission_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable snapshot of an authenticated user, safe to share between requests."""
+    id: int
+    username: str
+    email: str
+    role: Role
+    permissions: tuple[Permission, ...]
+    disabled: bool
+    permission_mask: int
+    row_version: int
+
+    @classmethod
+    def from_row(cls, row) -> "Principal":
+        """Build from a Core row of (id, username, email, role, permission_bits, disabled, row_version)."""
+        return cls(
+            id=row.id,
+            username=row.username,
+            email=row.email,
+            role=row.role,
+            permissions=permissions_from_mask(row.permission_bits),
+            disabled=bool(row.disabled),
+            permission_mask=ROLE_PERMISSION_MASKS.get(row.role, 0) | row.permission_bits,
+            row_version=row.row_version,
+        )
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            permissions=permissions_from_mask(user.permission_bits),
+            disabled=bool(user.disabled),
+            permission_mask=effective_permission_mask(user),
+            row_version=user.row_version,
+        )
+
+
+class PrincipalCache(TTLCache):
+    """Principals keyed by username, with an id index so writes can invalidate by user id."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._usernames_by_id: dict[int, str] = {}
+        # Ticks of a shared clock at which each user id was last invalidated, oldest first
+        self._clock = 0
+        self._generations: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self._forgotten_through = 0
+
+    def generation(self) -> int:
+        """The current tick. A fill reads it before its lookup and passes it to ``set``."""
+        return self._clock
+
+    def set(self, key: str, value: Principal, ttl: float | None = None, generation: int | None = None) -> None:
+        """Store a principal, unless it was invalidated after ``generation`` was read."""
+        if generation is not None and self._invalidated_since(value.id, generation):
+            return
+        super().set(key, value, ttl)
+        if key in self._entries:
+            self._usernames_by_id[value.id] = key
+
+    def invalidate(self, user_id: int) -> None:
+        self._clock += 1
+        now = time.monotonic()
+        self._generations[user_id] = (self._clock, now)
+        self._generations.move_to_end(user_id)
+        # Ticks older than the TTL are dropped; a fill that started before them is refused outright
+        while self._generations:
+            oldest, (tick, invalidated_at) = next(iter(self._generations.items()))
+            if invalidated_at > now - self.ttl:
+                break
+            del self._generations[oldest]
+            self._forgotten_through = tick
+
+        username = self._usernames_by_id.get(user_id)
+        if username is not None:
+            self.pop(username)
+
+    def _invalidated_since(self, user_id: int, generation: int) -> bool:
+        if generation < self._forgotten_through:
+            return True
+        tick, _ = self._generations.get(user_id, (0, 0.0))
+        return tick > generation
+
+    def clear(self) -> None:
+        super().clear()
+        self._usernames_by_id.clear()
+
+    def _remove(self, key: str) -> Principal:
+        value = super()._remove(key)
+        if self._usernames_by_id.get(value.id) == key:
+            del self._usernames_by_id[value.id]
+        return value
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
 _user_module = None
 
 
@@ -38,61 +169,104 @@ def get_permissions_for_role(role):
     return ROLE_PERMISSIONS.get(role, [])
 
 
-async def _get_user_by_username(username: str, db: Session) -> User | None:
+def invalidate_principal(user_id: int) -> None:
+    """Drop a cached principal after the user's row changed."""
+    principal_cache.invalidate(user_id)
+
+
+async def _get_principal(username: str, db: AsyncSession) -> Principal | None:
     """Lazily import and call the user module function"""
     global _user_module
     if _user_module is None:
         import crud.user as user_module
         _user_module = user_module
 
-    return _user_module.get_user_by_username(username, db)
+    return await _user_module.get_principal_by_username_async(username, db)
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
-    """Get the current user from a JWT token."""
-    credential_exception = HTTPException(
+def _credential_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("name")
 
-        if username is None:
-            raise credential_exception
-        token_data = TokenData(username=username)
+def _token_claims(token: str) -> dict:
+    """Verified access token claims, or 401."""
+    try:
+        payload = decode_access_token(token)
     except JWTError:
-        raise credential_exception
+        auth_failures.inc("invalid_token")
+        raise _credential_exception()
+    if payload.get("name") is None:
+        auth_failures.inc("invalid_token")
+        raise _credential_exception()
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_async_read_db)):
+    """Get the current user from a JWT token."""
+    token_data = TokenData(username=_token_claims(token)["name"])
+
+    principal = principal_cache.get(token_data.username)
+    if principal is not None:
+        return principal
 
-    user = await _get_user_by_username(token_data.username, db)
-    if user is None:
-        raise credential_exception
-    return user
+    # A write that commits while the lookup runs invalidates after it; the stale fill is then skipped
+    generation = principal_cache.generation()
+    principal = await _get_principal(token_data.username, db)
+    if principal is None:
+        auth_failures.inc("unknown_user")
+        raise _credential_exception()
 
+    principal_cache.set(principal.username, principal, generation=generation)
+    return principal
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.disabled:
+        auth_failures.inc("inactive_user")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 
-def has_permission(user: User, required_permission: Permission) -> bool:
+def effective_permission_mask(user: User | Principal) -> int:
+    """Role permissions plus the user's own, as a bitmask."""
+    if isinstance(user, Principal):
+        return user.permission_mask
+    role_mask = ROLE_PERMISSION_MASKS.get(user.role, 0) if user.role else 0
+    return role_mask | permission_mask(user.permissions or ())
+
+
+def has_permission(user: User | Principal, required_permission: Permission) -> bool:
     """Check if a user has a specific permission."""
-    role_permission = ROLE_PERMISSIONS.get(user.role) if user.role else []
-    all_permissions = set(role_permission + user.permissions)
+    return effective_permission_mask(user) & PERMISSION_BITS[required_permission] != 0
+
+
+def has_permissions(user: User | Principal, *required_permissions: Permission) -> bool:
+    """Check if a user has all the given permissions."""
+    required = permission_mask(required_permissions)
+    return effective_permission_mask(user) & required == required
 
-    return required_permission in all_permissions
 
+def require_permission(*permissions: Permission):
+    """Dependency that requires all the given permissions."""
+    required = permission_mask(permissions)
 
-def require_permission(permission: Permission):
-    async def permission_dependencies(current_user: User = Depends(get_current_active_user)):
-        if not has_permission(current_user, permission):
+    async def permission_dependencies(token: str = Depends(oauth2_scheme), db=Depends(get_async_read_db)):
+        claims = _token_claims(token)
+        # Tokens with an embedded mask are authorized from the claims alone; the read
+        # session is only opened when the user has to be looked up
+        mask = claims.get("perm")
+        if mask is None:
+            current_user = await get_current_active_user(await get_current_user(token, db))
+            mask = current_user.permission_mask
+        if mask & required != required:
+            auth_failures.inc("insufficient_permissions")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions"
             )
-        return current_user
 
     return permission_dependencies
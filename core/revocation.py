@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.database import AsyncSessionLocal, AsyncReadSessionLocal
+from core.security import add_revocation_hook
+from models.revoked_token import RevokedToken
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class RevocationList:
+    """In-memory mirror of the revoked_tokens table, checked on every authenticated request.
+
+    The common case, an empty or non-matching list, costs a dict lookup or two.
+    Each worker follows the table by id with ``reload``, so a revocation made in
+    one worker reaches the others within a reload interval.
+    """
+
+    def __init__(self):
+        self._jtis: dict[str, int] = {}  # jti -> expires_at
+        self._cutoffs: dict[str, tuple[float, int]] = {}  # username -> (issued_before, expires_at)
+        self._last_id = 0
+
+    def is_revoked(self, claims: dict) -> bool:
+        if self._jtis and claims.get("jti") in self._jtis:
+            return True
+        if self._cutoffs:
+            cutoff = self._cutoffs.get(claims.get("name"))
+            if cutoff is not None and claims.get("iat", 0) < cutoff[0]:
+                return True
+        return False
+
+    def add(self, jti: str | None, username: str | None, issued_before: float | None, expires_at: int) -> None:
+        if jti is not None:
+            self._jtis[jti] = expires_at
+        if username is not None and issued_before is not None:
+            previous = self._cutoffs.get(username)
+            if previous is None or previous[0] < issued_before:
+                self._cutoffs[username] = (issued_before, expires_at)
+
+    def sweep(self, now: float | None = None) -> None:
+        """Forget entries whose tokens have expired."""
+        now = time.time() if now is None else now
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._cutoffs = {name: cutoff for name, cutoff in self._cutoffs.items() if cutoff[1] > now}
+
+    async def reload(self, db) -> int:
+        """Apply rows added since the last reload; returns how many were read."""
+        rows = (await db.execute(
+            select(
+                RevokedToken.id, RevokedToken.jti, RevokedToken.username,
+                RevokedToken.issued_before, RevokedToken.expires_at,
+            )
+            .where(RevokedToken.id > self._last_id, RevokedToken.expires_at > int(time.time()))
+            .order_by(RevokedToken.id)
+        )).all()
+        for row in rows:
+            self.add(row.jti, row.username, row.issued_before, row.expires_at)
+        if rows:
+            self._last_id = rows[-1].id
+        return len(rows)
+
+    def stats(self) -> dict[str, int]:
+        return {"jtis": len(self._jtis), "user_cutoffs": len(self._cutoffs), "last_id": self._last_id}
+
+
+revocation_list = RevocationList()
+add_revocation_hook(revocation_list.is_revoked)
+
+
+async def prune_revoked_tokens(db) -> None:
+    """Delete denylist rows whose tokens have expired."""
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time())))
+    await db.commit()
+
+
+async def follow_revocations(reload_seconds: float, prune_seconds: float) -> None:
+    """Background task: keep ``revocation_list`` in step with the table and prune it."""
+    last_prune = 0.0
+    while True:
+        try:
+            async with AsyncReadSessionLocal() as db:
+                await revocation_list.reload(db)
+            if time.monotonic() - last_prune >= prune_seconds:
+                revocation_list.sweep()
+                async with AsyncSessionLocal() as db:
+                    await prune_revoked_tokens(db)
+                last_prune = time.monotonic()
+        except SQLAlchemyError:
+            logger.exception("Reloading revoked tokens failed")
+        await asyncio.sleep(reload_seconds)
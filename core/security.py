@@ -1,3 +1,11 @@
+import asyncio
+import hashlib
+import multiprocessing
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
 from datetime import timedelta, datetime, timezone
 
 from fastapi import HTTPException, status
@@ -5,9 +13,18 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
+from core.cache import TTLCache
 from core.config import settings
+from core.jwt_keys import KeyRing
+from core.metrics import password_hash_duration
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -22,6 +39,162 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password and, if its hash uses outdated parameters, return a fresh hash to store."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HashingQueueFull(Exception):
+    """Raised by PasswordHasher.admit when the backlog has reached its bound."""
+
+
+# Set while the current task holds an admitted slot, which its first pool job then uses
+_admitted_slot: ContextVar[bool] = ContextVar("admitted_slot", default=False)
+
+
+class HashingSlot:
+    """A login's place in the hashing backlog, counted from admission until the ``with`` block ends."""
+
+    def __init__(self, hasher: "PasswordHasher | None"):
+        self._hasher = hasher
+        self._token = None
+
+    def __enter__(self) -> "HashingSlot":
+        if self._hasher is not None:
+            self._token = _admitted_slot.set(True)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._hasher is not None:
+            if self._token is not None:
+                _admitted_slot.reset(self._token)
+            self._hasher._in_flight -= 1
+            self._hasher._admitted -= 1
+            self._hasher = None
+
+
+class PasswordHasher:
+    """Run Argon2 hashing and verification in a process pool, off the event loop.
+
+    With ``max_workers`` set to 0 the work runs inline, which is what scripts and
+    single-core deployments want.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        # Admitted slots only; registration and import jobs are in _in_flight but never shed logins
+        self._admitted = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent runs an event loop and possibly threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        started = time.perf_counter()
+        if self.max_workers <= 0:
+            try:
+                return func(*args)
+            finally:
+                password_hash_duration.observe(time.perf_counter() - started, operation)
+
+        loop = asyncio.get_running_loop()
+        # An admitted caller's first job is already counted by its slot
+        counted = not _admitted_slot.get()
+        if counted:
+            self._in_flight += 1
+        else:
+            _admitted_slot.set(False)
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            if counted:
+                self._in_flight -= 1
+            password_hash_duration.observe(time.perf_counter() - started, operation)
+
+    def admit(self) -> HashingSlot:
+        """Reserve a place in the backlog, or raise HashingQueueFull if ``max_queue`` jobs are waiting.
+
+        Callers that would rather shed load than queue (logins) take a slot before
+        any other work and run their hashing inside ``with slot:``. The slot counts
+        as in flight from this call on, so a simultaneous burst is bounded too.
+        Only other admitted slots count against ``max_queue``, so a bulk import
+        keeping the pool busy slows logins down but does not shed them.
+        With inline hashing it never raises and reserves nothing.
+        """
+        if self.max_workers <= 0:
+            return HashingSlot(None)
+        if 0 < self.max_queue <= self._admitted - self.max_workers:
+            raise HashingQueueFull()
+        self._in_flight += 1
+        self._admitted += 1
+        return HashingSlot(self)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the pool."""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password in the pool."""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Verify a password in the pool, rehashing it if its parameters are outdated."""
+        return await self._run("verify", verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """Pool size and how much hashing work is waiting for a worker."""
+        return {
+            "pool_size": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password for storing without blocking the event loop."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password without blocking the event loop; see verify_and_update_password."""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+
+key_ring = KeyRing(settings.ALGORITHM, settings.SECRET_KEY, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
+
+def _encode_jwt(claims: dict) -> str:
+    kid, key = key_ring.signing_key()
+    return jwt.encode(claims, key, algorithm=settings.ALGORITHM, headers={"kid": kid} if kid else None)
+
+
+def verify_jwt(token: str) -> dict:
+    """Check a JWT's signature (with the key its kid names) and expiry, and return its claims."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    return jwt.decode(token, key_ring.verification_key(kid), algorithms=[settings.ALGORITHM])
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -31,7 +204,58 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire, "type": "access"})
+    # iat keeps sub-second precision so revoking a user's tokens can't catch one issued right after
+    to_encode.update({"exp": expire, "iat": time.time(), "type": "access"})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+
+    return _encode_jwt(to_encode)
+
+
+def create_refresh_token(data: dict, expires_at: datetime) -> str:
+    """Create a JWT refresh token. ``data`` carries the subject, ``jti`` and ``fam`` claims."""
+    to_encode = {**data, "exp": expires_at, "type": "refresh"}
+    return _encode_jwt(to_encode)
+
+
+def decode_refresh_token(token: str) -> dict:
+    """Verify a refresh JWT and return its claims. Raises JWTError otherwise."""
+    claims = verify_jwt(token)
+    if claims.get("type") != "refresh":
+        raise JWTError("Not a refresh token")
+    return claims
+
+
+# Verified claims keyed by a digest of the raw token; each entry lives until the token's exp
+token_cache = TTLCache(settings.TOKEN_CACHE_MAX_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+_revocation_hooks: list[Callable[[dict], bool]] = []
+
+
+def add_revocation_hook(hook: Callable[[dict], bool]) -> None:
+    """Register a check that returns True for claims that must no longer be accepted."""
+    _revocation_hooks.append(hook)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify a JWT and return its claims.
+
+    Verified claims are cached until the token expires; revocation hooks run on
+    every call, cached or not. The returned dict is shared and must not be mutated.
+    Raises JWTError for invalid, expired or revoked tokens, and for tokens of
+    another type (refresh tokens are signed with the same key).
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = verify_jwt(token)
+        if claims.get("type") != "access":
+            raise JWTError("Not an access token")
+        exp = claims.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        if ttl is None or ttl > 0:
+            token_cache.set(key, claims, ttl)
 
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    for hook in _revocation_hooks:
+        if hook(claims):
+            raise JWTError("Token has been revoked")
+    return claims
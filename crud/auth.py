@@ -1,14 +1,202 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import cache
+
+from jose import JWTError
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from core.security import verify_password
+from core.config import settings
+from core.rbac import effective_permission_mask
+from core.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
+from core.revocation import revocation_list
+from models.refresh_token import RefreshToken
+from models.revoked_token import RevokedToken
 from models.user import User
 
 
+@cache
+def _dummy_password_hash() -> str:
+    """Hash checked for unknown usernames, so they cost the same as a wrong password."""
+    return get_password_hash("unknown-user-dummy-password")
+
+
 def authenticate_user(username: str, password: str, db: Session) -> User | None:
-    """Authenticate a user with a username and password."""
+    """Authenticate a user with a username and password, rehashing outdated hashes."""
     user = db.query(User).filter(User.username == username).first()
     if not user:
+        verify_password(password, _dummy_password_hash())
+        return None
+    verified, new_hash = verify_and_update_password(password, user.password_hash)  # sprawdzamy hash
+    if not verified:
+        return None
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    return user
+
+
+async def authenticate_user_async(
+        username: str, password: str, db: AsyncSession, write_db: AsyncSession | None = None
+) -> User | None:
+    """Authenticate a user, verifying the password in the hashing pool.
+
+    ``db`` may be a read-only session. When the stored hash uses outdated Argon2
+    parameters, the fresh one is written through ``write_db`` if given.
+    """
+    user = await db.scalar(select(User).where(User.username == username))
+    # End the transaction so the connection goes back to the pool during the slow hash check
+    await db.commit()
+    if not user:
+        await verify_password_async(password, _dummy_password_hash())
+        return None
+    verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+    if not verified:
+        return None
+    if new_hash and write_db is not None:
+        # Only replace the hash we verified; a concurrent password change wins
+        await write_db.execute(
+            update(User)
+            .where(User.id == user.id, User.password_hash == user.password_hash)
+            .values(password_hash=new_hash)
+        )
+        await write_db.commit()
+    return user
+
+
+def access_token_claims(user: User) -> dict:
+    """Claims for a user's access token, with role and permission mask if they are embedded."""
+    claims = {"name": user.username}
+    if settings.JWT_EMBED_PERMISSIONS:
+        claims["role"] = user.role.value
+        # Disabled users get no permissions rather than a separate claim to check
+        claims["perm"] = 0 if user.disabled else effective_permission_mask(user)
+    return claims
+
+
+async def issue_token_pair_async(user: User, db: AsyncSession, family: str | None = None) -> dict:
+    """Create an access token and a refresh token for ``user`` and record the refresh token.
+
+    ``family`` continues an existing rotation chain; a new login starts a new one.
+    The caller commits.
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    jti = uuid.uuid4().hex
+    family = family or uuid.uuid4().hex
+    now = int(time.time())
+
+    # Expired rows of this user go on the way; the user_id index keeps it cheap
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id, RefreshToken.expires_at <= now))
+    db.add(RefreshToken(jti=jti, family=family, user_id=user.id, expires_at=int(expires_at.timestamp())))
+
+    return {
+        "access_token": create_access_token(data=access_token_claims(user)),
+        "refresh_token": create_refresh_token({"name": user.username, "jti": jti, "fam": family}, expires_at),
+        "token_type": "bearer",
+    }
+
+
+async def rotate_refresh_token_async(refresh_token: str, db: AsyncSession) -> dict | None:
+    """Exchange a refresh token for a new pair, or return None if it can't be used.
+
+    The token is claimed with a single conditional UPDATE, so of two concurrent
+    requests with the same token only one wins. Presenting a token that was
+    already used revokes its whole family: either the client or an attacker
+    holds a stolen copy, and both have to log in again.
+    """
+    try:
+        claims = decode_refresh_token(refresh_token)
+    except JWTError:
         return None
-    if not verify_password(password, user.password_hash):  # sprawdzamy hash
+    jti, family = claims.get("jti"), claims.get("fam")
+    if not jti or not family:
         return None
-    return user
\ No newline at end of file
+
+    now = int(time.time())
+    user_id = await db.scalar(
+        update(RefreshToken)
+        .where(
+            RefreshToken.jti == jti,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked.is_(False),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.user_id)
+    )
+    if user_id is None:
+        reused = await db.scalar(select(RefreshToken.used_at).where(RefreshToken.jti == jti))
+        if reused is not None:
+            await db.execute(update(RefreshToken).where(RefreshToken.family == family).values(revoked=True))
+        await db.commit()
+        return None
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if user is None or user.disabled:
+        await db.execute(update(RefreshToken).where(RefreshToken.family == family).values(revoked=True))
+        await db.commit()
+        return None
+
+    pair = await issue_token_pair_async(user, db, family)
+    await db.commit()
+    return pair
+
+
+async def revoke_access_token_async(claims: dict, db: AsyncSession, refresh_token: str | None = None) -> None:
+    """Revoke one access token (logout) and, if given, the refresh token family issued with it."""
+    jti, expires_at = claims.get("jti"), int(claims["exp"])
+    if jti is not None:
+        await db.execute(
+            insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing()
+        )
+    if refresh_token is not None:
+        try:
+            refresh_claims = decode_refresh_token(refresh_token)
+        except JWTError:
+            refresh_claims = {}
+        # Only the caller's own family
+        if refresh_claims.get("name") == claims.get("name") and refresh_claims.get("fam"):
+            await db.execute(
+                update(RefreshToken).where(RefreshToken.family == refresh_claims["fam"]).values(revoked=True)
+            )
+    await db.commit()
+    # This worker applies it right away; the others on their next reload
+    revocation_list.add(jti, None, None, expires_at)
+
+
+async def revoke_user_tokens_async(user_id: int, db: AsyncSession) -> bool:
+    """Revoke every access and refresh token issued to a user so far."""
+    username = await db.scalar(select(User.username).where(User.id == user_id))
+    if username is None:
+        return False
+
+    expire_access_tokens(username, db)
+    await db.execute(update(RefreshToken).where(RefreshToken.user_id == user_id).values(revoked=True))
+    await db.commit()
+    return True
+
+
+def expire_access_tokens(username: str, db: AsyncSession | Session) -> None:
+    """Revoke the access tokens issued to ``username`` so far; the caller commits.
+
+    Refresh tokens keep working, so this is also how clients get moved onto
+    tokens with up-to-date embedded claims. This worker applies it at once, even
+    before the commit: if the commit fails, the tokens are rejected here for the
+    rest of their lifetime, which errs on the safe side.
+    """
+    issued_before = time.time()
+    expires_at = int(issued_before) + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 1
+    db.add(RevokedToken(username=username, issued_before=issued_before, expires_at=expires_at))
+    revocation_list.add(None, username, issued_before, expires_at)
@@ -1,12 +1,35 @@
+import asyncio
 import json
+from collections.abc import AsyncIterator
+
+from itertools import groupby
+
+from sqlalchemy import bindparam, select, insert, update, delete, func, or_, and_, true, union_all, Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Session
 from pydantic import EmailStr
 
-from core.rbac import get_permissions_for_role
-from core.security import get_password_hash
-from models.user import User, Role
-from schemas.user import UserCreate, UserUpdate, Permission
+from core.change_feed import user_changes
+from core.config import settings
+from core.rbac import Principal, PERMISSION_BITS, ROLE_PERMISSION_MASKS, invalidate_principal, permissions_from_mask
+from core.security import get_password_hash, get_password_hash_async, password_hasher
+from crud.auth import expire_access_tokens
+from models.refresh_token import RefreshToken
+from models.user import User, UserTombstone, Role, has_permission_bit
+from schemas.user import (
+    UserCreate,
+    UserUpdate,
+    Permission,
+    UserImportResult,
+    UserBatchOperation,
+    UserBatchRequest,
+    UserBatchResult,
+    User as UserSchema,
+    UserChange,
+    UserChangesResponse,
+)
 
 
 def get_user_by_username(username: str, db: Session) -> User | None:
@@ -19,23 +42,111 @@ def get_user_by_email(email: EmailStr, db: Session) -> User | None:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(user: UserCreate, db: Session) -> User:
-    """Create a new user in SQLite."""
+def _expire_embedded_claims(username: str, db: Session | AsyncSession) -> None:
+    """Access tokens embedding a user's old name, role, permissions or status must not outlive the change."""
+    if settings.JWT_EMBED_PERMISSIONS:
+        expire_access_tokens(username, db)
+
+
+def _user_values(user: UserCreate, password_hash: str) -> dict:
     user_dict = user.model_dump()
-    user_dict["password_hash"] = get_password_hash(user_dict["password"])
+    user_dict["password_hash"] = password_hash
     user_dict.pop("password", None)
 
     role = user_dict.get("role", Role.USER)
-    permissions = get_permissions_for_role(
-        role)  # zwraca zawsze listę i błąd zapisu, ponieważ alchemy nie wie jak zapisać listę
-    user_dict["permissions"] = permissions
+    user_dict["permission_bits"] = ROLE_PERMISSION_MASKS.get(role, 0)
     user_dict["disabled"] = False
 
-    new_user = User(**user_dict)
+    return user_dict
+
+
+def _build_user(user: UserCreate, password_hash: str) -> User:
+    return User(**_user_values(user, password_hash))
+
+
+# Mutations below are a single UPDATE ... RETURNING (SQLite >= 3.35): no SELECT before,
+# no refresh after, and uniqueness is left to the unique indexes.
+
+def _update_returning(user_id: int, **values):
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+        # Overwrite the instance if the session already holds this user
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+def _with_permission(permission: Permission):
+    return User.permission_bits.bitwise_or(PERMISSION_BITS[permission])
+
+
+def _without_permission(permission: Permission):
+    return User.permission_bits.bitwise_and(~PERMISSION_BITS[permission])
+
+
+def _update_values(user_update: UserUpdate, password_hash: str | None) -> dict:
+    values = {}
+    if user_update.username is not None:
+        values["username"] = user_update.username
+    if user_update.email is not None:
+        values["email"] = user_update.email
+    if password_hash is not None:
+        values["password_hash"] = password_hash
+    return values
+
+
+def _uniqueness_error(error: IntegrityError) -> ValueError:
+    """The error the API reports for a unique index violation; anything else is re-raised."""
+    message = str(error.orig)
+    if "users.username" in message:
+        return ValueError("Username already exists")
+    if "users.email" in message:
+        return ValueError("Email already exists.")
+    raise error
+
+
+def _commit_update(user_id: int, statement, db: Session, previous_username: str | None = None) -> User | None:
+    """Run an UPDATE ... RETURNING and commit it; claims are only expired once it has succeeded."""
+    user = db.scalar(statement)
+    if user is None:
+        db.rollback()
+        return None
+    if previous_username is not None and previous_username != user.username:
+        _expire_embedded_claims(previous_username, db)
+    _expire_embedded_claims(user.username, db)
+    db.commit()
+    invalidate_principal(user_id)
+    user_changes.notify()
+    return user
+
+
+async def _commit_update_async(
+        user_id: int, statement, db: AsyncSession, previous_username: str | None = None
+) -> User | None:
+    """Run an UPDATE ... RETURNING and commit it; claims are only expired once it has succeeded."""
+    user = await db.scalar(statement)
+    if user is None:
+        await db.rollback()
+        return None
+    if previous_username is not None and previous_username != user.username:
+        _expire_embedded_claims(previous_username, db)
+    _expire_embedded_claims(user.username, db)
+    await db.commit()
+    invalidate_principal(user_id)
+    user_changes.notify()
+    return user
+
+
+def create_user(user: UserCreate, db: Session) -> User:
+    """Create a new user in SQLite."""
+    new_user = _build_user(user, get_password_hash(user.password))
 
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    user_changes.notify()
 
     return new_user
 
@@ -47,31 +158,21 @@ def get_user_by_id(user_id: int, db: Session) -> User | None:
 
 def update_user(user_id: int, user_update: UserUpdate, db: Session) -> User | None:
     """Update a user in SQLite"""
-    user = get_user_by_id(user_id, db)
-    if not user:
-        return None
+    password_hash = get_password_hash(user_update.password) if user_update.password is not None else None
+    values = _update_values(user_update, password_hash)
+    if not values:
+        return get_user_by_id(user_id, db)
 
-    if user_update.username is not None and user_update.username != user.username:
-        existing_user = get_user_by_username(user_update.username, db)
-        if existing_user and existing_user.id != user_id:
-            raise ValueError("Username already exists")
-        user.username = user_update.username
+    previous = None
+    if "username" in values and settings.JWT_EMBED_PERMISSIONS:
+        # Tokens name the user by the old username, which RETURNING can't report
+        previous = db.scalar(select(User.username).where(User.id == user_id))
 
-    if user_update.email is not None and user_update.email != user.email:
-        existing_email = get_user_by_email(user_update.email, db)
-        if existing_email and existing_email.id != user_id:
-            raise ValueError("Email already exists.")
-        user.email = user_update.email
-
-    if user_update.password is not None:
-        user.password_hash = get_password_hash(user_update.password)
-
-    # Zapis do bazy
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    return user
+    try:
+        return _commit_update(user_id, _update_returning(user_id, **values), db, previous)
+    except IntegrityError as e:
+        db.rollback()
+        raise _uniqueness_error(e)
 
 
 def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
@@ -81,76 +182,414 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
 
 def update_user_role(user_id: int, role: Role, db: Session) -> User | None:
     """Update a user's role"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return None
+    statement = _update_returning(user_id, role=role, permission_bits=ROLE_PERMISSION_MASKS[role])
+    return _commit_update(user_id, statement, db)
 
-    permissions = get_permissions_for_role(role)
 
-    user.role = role
-    user.permissions = permissions
-    db.commit()
-    db.refresh(user)
+def update_user_status(user_id: int, disabled: bool, db: Session) -> User | None:
+    """Update a user's disabled status"""
+    return _commit_update(user_id, _update_returning(user_id, disabled=disabled), db)
 
-    return user
 
+def add_user_permission(user_id: int, permission: Permission, db: Session) -> User | None:
+    """Add a permission to a user"""
+    statement = _update_returning(user_id, permission_bits=_with_permission(permission))
+    return _commit_update(user_id, statement, db)
 
-def update_user_status(user_id: int, disabled: bool, db: Session) -> bool:
-    """Update a user's disabled status"""
+
+def remove_user_permission(user_id: int, permission: Permission, db: Session) -> User | None:
+    """Remove a permission from a user"""
+    statement = _update_returning(user_id, permission_bits=_without_permission(permission))
+    return _commit_update(user_id, statement, db)
+
+
+def delete_user(user_id: int, db: Session) -> bool:
+    """Delete a user and their widgets"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return False
 
-    user.disabled = disabled
+    if user.role == Role.ADMIN:
+        admin_count = db.query(User).filter(User.role == Role.ADMIN).count()
+        if admin_count <= 1:
+            return False
+
+    # SQLite doesn't enforce the foreign key; ids can be reused after a delete
+    _expire_embedded_claims(user.username, db)
+    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
+    db.add(UserTombstone(user_id=user_id))
+    db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
+    user_changes.notify()
+
     return True
 
 
-def add_user_permission(user_id: int, permission: Permission, db: Session) -> User | None:
-    """Add a permission to a user"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return None
+# Async API used by the request handlers. The sync functions above stay for scripts.
 
-    current_permissions = user.permissions or []
-    if permission not in current_permissions:
-        current_permissions.append(permission)
-        user.permissions = current_permissions
-        db.commit()
-        db.refresh(user)
+async def get_user_by_username_async(username: str, db: AsyncSession) -> User | None:
+    """Get a user by username from SQL (async)."""
+    return await db.scalar(select(User).where(User.username == username))
 
-    return user
 
+async def get_user_by_email_async(email: EmailStr, db: AsyncSession) -> User | None:
+    """Get a user by email from SQL (async)."""
+    return await db.scalar(select(User).where(User.email == email))
 
-def remove_user_permission(user_id: int, permission: Permission, db: Session) -> User | None:
-    """Remove a permission from a user"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return None
 
-    current_permissions = user.permissions or []
-    perm_value = permission.value
-    if permission in current_permissions:
-        current_permissions.remove(perm_value)
-        user.permissions = list(current_permissions)
-        db.commit()
-        db.refresh(user)
+async def get_user_by_id_async(user_id: int, db: AsyncSession) -> User | None:
+    """Get a user by id from SQL (async)."""
+    return await db.scalar(select(User).where(User.id == user_id))
 
-    return user
 
+# Auth hot path: only the columns a Principal needs, through Core, so no ORM instance
+# or identity-map entry is created per request. Built once, so the compiled SQL is
+# always found in SQLAlchemy's statement cache.
+_users = User.__table__
+_principal_query = select(
+    _users.c.id, _users.c.username, _users.c.email, _users.c.role,
+    _users.c.permission_bits, _users.c.disabled, _users.c.row_version,
+).where(_users.c.username == bindparam("username"))
 
-def delete_user(user_id: int, db: Session) -> bool:
-    """Delete a user and their widgets"""
-    user = db.query(User).filter(User.id == user_id).first()
+
+async def get_principal_by_username_async(username: str, db: AsyncSession) -> Principal | None:
+    """Read-only snapshot of a user for authentication, without loading the ORM object."""
+    connection = await db.connection()
+    row = (await connection.execute(_principal_query, {"username": username})).first()
+    return None if row is None else Principal.from_row(row)
+
+
+async def get_users_by_ids_or_usernames_async(
+        ids: list[int], usernames: list[str], db: AsyncSession
+) -> list[User]:
+    """Users with any of the given ids or usernames, in no particular order, with one IN query."""
+    if not ids and not usernames:
+        return []
+    return list(await db.scalars(select(User).where(or_(User.id.in_(ids), User.username.in_(usernames)))))
+
+
+async def create_user_async(user: UserCreate, db: AsyncSession) -> User:
+    """Create a new user, hashing the password in the hashing pool."""
+    new_user = _build_user(user, await get_password_hash_async(user.password))
+
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    user_changes.notify()
+
+    return new_user
+
+
+async def import_users_async(records: list[tuple[int, UserCreate]], db: AsyncSession) -> list[UserImportResult]:
+    """Create a batch of users in one transaction.
+
+    Uniqueness is checked for the whole batch with a single query, passwords are
+    hashed in the hashing pool, at most one job per worker at a time so logins can
+    still get a worker, and rows go in with one executemany.
+    ``records`` pairs each user with its line number; results keep that order.
+    """
+    usernames = [user.username for _, user in records]
+    emails = [user.email for _, user in records]
+    existing = await db.execute(
+        select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+    )
+    taken_usernames, taken_emails = set(), set()
+    for username, email in existing:
+        taken_usernames.add(username)
+        taken_emails.add(email)
+    # Release the writer connection while the batch is hashed
+    await db.commit()
+
+    results: list[UserImportResult] = []
+    accepted: list[tuple[UserImportResult, UserCreate]] = []
+    for line, user in records:
+        result = UserImportResult(line=line, status="duplicate", username=user.username)
+        if user.username in taken_usernames:
+            result.detail = "Username already exists"
+        elif user.email in taken_emails:
+            result.detail = "Email already exists."
+        else:
+            taken_usernames.add(user.username)
+            taken_emails.add(user.email)
+            accepted.append((result, user))
+        results.append(result)
+
+    if not accepted:
+        return results
+
+    workers = asyncio.Semaphore(max(1, password_hasher.max_workers))
+
+    async def hash_password(password: str) -> str:
+        async with workers:
+            return await get_password_hash_async(password)
+
+    password_hashes = await asyncio.gather(*(hash_password(user.password) for _, user in accepted))
+    rows = [_user_values(user, password_hash) for (_, user), password_hash in zip(accepted, password_hashes)]
+
+    try:
+        inserted = await db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), rows)
+        ids = inserted.scalars().all()
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent writer; fall back to row-by-row to report which ones
+        await db.rollback()
+        ids = []
+        for row in rows:
+            try:
+                ids.append(await db.scalar(insert(User).returning(User.id), row))
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                ids.append(None)
+
+    user_changes.notify()
+    for (result, _), user_id in zip(accepted, ids):
+        if user_id is None:
+            result.detail = "Username or email already exists"
+        else:
+            result.status = "created"
+            result.id = user_id
+
+    return results
+
+
+async def update_user_async(user_id: int, user_update: UserUpdate, db: AsyncSession) -> User | None:
+    """Update a user, hashing a new password in the hashing pool."""
+    # Hash before touching the session, so the writer connection isn't held while hashing
+    password_hash = None
+    if user_update.password is not None:
+        password_hash = await get_password_hash_async(user_update.password)
+
+    values = _update_values(user_update, password_hash)
+    if not values:
+        return await get_user_by_id_async(user_id, db)
+
+    previous = None
+    if "username" in values and settings.JWT_EMBED_PERMISSIONS:
+        # Tokens name the user by the old username, which RETURNING can't report
+        previous = await db.scalar(select(User.username).where(User.id == user_id))
+
+    try:
+        return await _commit_update_async(user_id, _update_returning(user_id, **values), db, previous)
+    except IntegrityError as e:
+        await db.rollback()
+        raise _uniqueness_error(e)
+
+
+def _filter_conditions(
+        role: Role | None,
+        disabled: bool | None,
+        username_prefix: str | None,
+        permission: Permission | None = None,
+) -> list:
+    conditions = []
+    if permission is not None:
+        # Served by the permission's partial index, which holds only the users that have it
+        conditions.append(has_permission_bit(PERMISSION_BITS[permission]))
+    if role is not None:
+        conditions.append(User.role == role)
+    if disabled is not None:
+        conditions.append(User.disabled == disabled)
+    if username_prefix:
+        # A range instead of LIKE, so the username index can serve it
+        conditions.append(User.username >= username_prefix)
+        conditions.append(User.username < username_prefix + "\U0010ffff")
+    return conditions
+
+
+async def get_all_users_async(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        *,
+        after_id: int | None = None,
+        role: Role | None = None,
+        disabled: bool | None = None,
+        username_prefix: str | None = None,
+        permission: Permission | None = None,
+) -> list[User]:
+    """Get users in id order (for admin purposes).
+
+    Pass ``after_id`` for keyset pagination; ``skip`` is kept for offset-based clients.
+    """
+    query = select(User).where(*_filter_conditions(role, disabled, username_prefix, permission))
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+
+    result = await db.scalars(query.order_by(User.id).offset(skip).limit(limit))
+    return list(result)
+
+
+async def stream_users_async(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[tuple]:
+    """Stream every user's public columns in id order, fetching ``batch_size`` rows at a time."""
+    query = (
+        select(User.id, User.email, User.username, User.role, User.permission_bits, User.disabled)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(query)
+    async for batch in result.partitions():
+        for user_id, email, username, role, permission_bits, disabled in batch:
+            yield user_id, email, username, role, permissions_from_mask(permission_bits), disabled
+
+
+async def update_user_role_async(user_id: int, role: Role, db: AsyncSession) -> User | None:
+    """Update a user's role"""
+    statement = _update_returning(user_id, role=role, permission_bits=ROLE_PERMISSION_MASKS[role])
+    return await _commit_update_async(user_id, statement, db)
+
+
+async def update_user_status_async(user_id: int, disabled: bool, db: AsyncSession) -> User | None:
+    """Update a user's disabled status"""
+    return await _commit_update_async(user_id, _update_returning(user_id, disabled=disabled), db)
+
+
+async def add_user_permission_async(user_id: int, permission: Permission, db: AsyncSession) -> User | None:
+    """Add a permission to a user"""
+    statement = _update_returning(user_id, permission_bits=_with_permission(permission))
+    return await _commit_update_async(user_id, statement, db)
+
+
+async def remove_user_permission_async(user_id: int, permission: Permission, db: AsyncSession) -> User | None:
+    """Remove a permission from a user"""
+    statement = _update_returning(user_id, permission_bits=_without_permission(permission))
+    return await _commit_update_async(user_id, statement, db)
+
+
+async def delete_user_async(user_id: int, db: AsyncSession) -> bool:
+    """Delete a user"""
+    user = await get_user_by_id_async(user_id, db)
     if not user:
         return False
 
     if user.role == Role.ADMIN:
-        admin_count = db.query(User).filter(User.role == Role.ADMIN).count()
+        admin_count = await db.scalar(select(func.count()).select_from(User).where(User.role == Role.ADMIN))
         if admin_count <= 1:
             return False
 
-    db.delete(user)
-    db.commit()
+    _expire_embedded_claims(user.username, db)
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    db.add(UserTombstone(user_id=user_id))
+    await db.delete(user)
+    await db.commit()
+    invalidate_principal(user_id)
+    user_changes.notify()
+
+    return True
+
 
-    return True
\ No newline at end of file
+def _operation_values(operation: UserBatchOperation) -> dict:
+    if operation.op == "set_role":
+        return {"role": operation.role, "permission_bits": ROLE_PERMISSION_MASKS[operation.role]}
+    if operation.op == "set_status":
+        return {"disabled": operation.disabled}
+    if operation.op == "add_permission":
+        return {"permission_bits": _with_permission(operation.permission)}
+    return {"permission_bits": _without_permission(operation.permission)}
+
+
+async def _apply_to_matching(condition, operation: UserBatchOperation, db: AsyncSession) -> tuple[list[Row], set[int]]:
+    """Apply ``operation`` to every user matching ``condition`` in one UPDATE.
+
+    Returns the updated (id, username) rows, and the ids of admins left alone
+    because demoting them would leave no admin at all (the lowest id is kept).
+    """
+    protected: set[int] = set()
+    if operation.op == "set_role" and operation.role != Role.ADMIN:
+        demoted = set(await db.scalars(select(User.id).where(condition, User.role == Role.ADMIN)))
+        if demoted:
+            admin_count = await db.scalar(select(func.count()).select_from(User).where(User.role == Role.ADMIN))
+            if admin_count <= len(demoted):
+                protected = {min(demoted)}
+                condition = and_(condition, User.id.not_in(protected))
+
+    rows = (await db.execute(
+        update(User)
+        .where(condition)
+        .values(**_operation_values(operation))
+        .returning(User.id, User.username)
+        .execution_options(synchronize_session=False)
+    )).all()
+    return rows, protected
+
+
+async def apply_user_batch_async(batch: UserBatchRequest, db: AsyncSession) -> list[UserBatchResult]:
+    """Apply a batch of admin changes in one transaction.
+
+    Consecutive items with the same operation share one set-based UPDATE, so a
+    batch that does one thing to many users is a single statement, while items
+    for the same user still apply in request order.
+    """
+    last_admin = "Cannot remove the last admin"
+    results: list[UserBatchResult] = []
+    updated_rows: list[Row] = []
+
+    if batch.operation is not None:
+        user_filter = batch.filter
+        conditions = _filter_conditions(user_filter.role, user_filter.disabled, user_filter.username_prefix)
+        rows, protected = await _apply_to_matching(and_(true(), *conditions), batch.operation, db)
+        updated_rows.extend(rows)
+        results.extend(UserBatchResult(user_id=row.id, status="updated") for row in rows)
+        results.extend(UserBatchResult(user_id=user_id, status="rejected", detail=last_admin) for user_id in protected)
+    else:
+        for _, run in groupby(batch.items, key=lambda item: item.key()):
+            run = list(run)
+            rows, protected = await _apply_to_matching(User.id.in_({item.user_id for item in run}), run[0], db)
+            updated_rows.extend(rows)
+            updated = {row.id for row in rows}
+            for item in run:
+                if item.user_id in updated:
+                    results.append(UserBatchResult(user_id=item.user_id, status="updated"))
+                elif item.user_id in protected:
+                    results.append(UserBatchResult(user_id=item.user_id, status="rejected", detail=last_admin))
+                else:
+                    results.append(UserBatchResult(user_id=item.user_id, status="not_found", detail="User not found"))
+
+    for username in {row.username for row in updated_rows}:
+        _expire_embedded_claims(username, db)
+    await db.commit()
+    for user_id in {row.id for row in updated_rows}:
+        invalidate_principal(user_id)
+    if updated_rows:
+        user_changes.notify()
+    return results
+
+
+async def get_user_changes_async(since: int, limit: int, db: AsyncSession) -> UserChangesResponse:
+    """Users created, changed or deleted after version ``since``, oldest change first.
+
+    A user appears once, in its current state. Rows written by one statement share
+    a version, so a page never splits a version: it stops before the version that
+    would overflow ``limit``, or returns that version whole if it alone is larger.
+    """
+    versions = list(await db.scalars(
+        union_all(
+            select(User.row_version.label("version")).where(User.row_version > since),
+            select(UserTombstone.version).where(UserTombstone.version > since),
+        ).order_by("version").limit(limit + 1)
+    ))
+    if not versions:
+        return UserChangesResponse(changes=[], next_since=since)
+
+    upper, has_more = versions[-1], False
+    if len(versions) > limit:
+        overflow = versions[limit]
+        upper = max((version for version in versions if version < overflow), default=overflow)
+        has_more = upper < overflow or await db.scalar(select(
+            select(User.id).where(User.row_version > upper).exists()
+            | select(UserTombstone.id).where(UserTombstone.version > upper).exists()
+        ))
+
+    users = await db.scalars(select(User).where(User.row_version > since, User.row_version <= upper))
+    tombstones = await db.execute(
+        select(UserTombstone.version, UserTombstone.user_id)
+        .where(UserTombstone.version > since, UserTombstone.version <= upper)
+    )
+    changes = [
+        UserChange(version=user.row_version, user_id=user.id, user=UserSchema.model_validate(user))
+        for user in users
+    ]
+    changes.extend(UserChange(version=version, user_id=user_id, deleted=True) for version, user_id in tombstones)
+    changes.sort(key=lambda change: (change.version, change.user_id))
+    return UserChangesResponse(changes=changes, next_since=upper, has_more=has_more)
@@ -1,21 +1,46 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from api.users import router as users_router
 from api.auth import router as auth_router
+from api.metrics import router as metrics_router
 from core.config import settings
-from core.database_utils import init_database
+from core.database import describe_storage_profile, dispose_engines
+from core.database_utils import ensure_indexes, init_database
+from core.middleware import add_middleware
+from core.revocation import follow_revocations
+from core.security import password_hasher
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring an existing database up to the models however the app is started (uvicorn main:app too)
+    ensure_indexes()
+    logger.info("SQLite storage profile: %s", await describe_storage_profile())
+    revocations = asyncio.create_task(
+        follow_revocations(settings.REVOCATION_RELOAD_SECONDS, settings.REVOCATION_PRUNE_SECONDS)
+    )
+    yield
+    revocations.cancel()
+    password_hasher.shutdown()
+    await dispose_engines()
 
-# from core.middleware import add_middleware
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API for CRUD operations on widgets",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-routers = [users_router, auth_router]
+routers = [users_router, auth_router, metrics_router]
 
-# add_middleware(app)
+add_middleware(app)
 
 for router in routers:
     app.include_router(router)
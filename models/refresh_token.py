@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+
+from core.database import Base
+
+
+class RefreshToken(Base):
+    """One issued refresh token. Rotation marks it used and issues the next token in
+    the same family; presenting a used token again revokes the whole family."""
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    family = Column(String(32), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Unix timestamps
+    expires_at = Column(Integer, nullable=False, index=True)
+    used_at = Column(Integer, nullable=True)
+    revoked = Column(Boolean, default=False, nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float
+
+from core.database import Base
+
+
+class RevokedToken(Base):
+    """Denylist entry: either one access token by ``jti``, or every token of ``username``
+    issued before ``issued_before``. Rows are pruned once ``expires_at`` passes, by
+    which time the tokens they cover have expired anyway."""
+    __tablename__ = "revoked_tokens"
+
+    # Workers reload the list incrementally by id, so ids must never be reused
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), nullable=True, unique=True)
+    username = Column(String(50), nullable=True)
+    issued_before = Column(Float, nullable=True)
+    # Unix timestamp
+    expires_at = Column(Integer, nullable=False, index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
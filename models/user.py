@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum
-from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy.types import JSON
+import time
+
+from sqlalchemy import Column, Integer, String, Boolean, Enum, Float, Index, text
 from enum import Enum as PyEnum
 
 from core.database import Base
+from core.rbac import PERMISSION_BITS, permissions_from_mask
 
 
 class Role(str, PyEnum):
@@ -12,6 +13,21 @@ class Role(str, PyEnum):
     USER = "user"
 
 
+# Next change-feed version, evaluated inside each INSERT/UPDATE/tombstone statement, so every
+# write bumps it without an extra round trip. Both columns are indexed, so max() is a seek.
+# Rows written by one statement share a version.
+NEXT_ROW_VERSION = text(
+    "(SELECT coalesce(max(v), 0) + 1 FROM ("
+    "SELECT max(row_version) AS v FROM users UNION ALL SELECT max(version) FROM user_tombstones))"
+)
+
+
+def has_permission_bit(bit: int):
+    """``permission_bits & bit != 0`` with the bit inlined: SQLite only uses a partial
+    index when the query repeats its WHERE term literally, bound parameters don't match."""
+    return text(f"users.permission_bits & {int(bit)} != 0")
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,5 +36,36 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     role = Column(Enum(Role), default=Role.USER, nullable=False)
-    permissions = Column(MutableList.as_mutable(JSON), default=list, nullable=False)
+    # The user's permissions as a core.rbac.PERMISSION_BITS mask
+    permission_bits = Column(Integer, nullable=False, default=0)
     disabled = Column(Boolean, default=False)
+    row_version = Column(Integer, nullable=False, default=NEXT_ROW_VERSION, onupdate=NEXT_ROW_VERSION, index=True)
+    updated_at = Column(Float, default=time.time, onupdate=time.time)
+
+    __table_args__ = (
+        # Filtered listings walk these in id order for keyset pagination
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_disabled_id", "disabled", "id"),
+        # One partial index per permission, holding only the users that have it
+        *(
+            Index(f"ix_users_has_{permission.name.lower()}", "id", sqlite_where=has_permission_bit(bit))
+            for permission, bit in PERMISSION_BITS.items()
+        ),
+    )
+    # Fetch the SQL-computed row_version with RETURNING instead of lazy-loading it later
+    __mapper_args__ = {"eager_defaults": True}
+
+    @property
+    def permissions(self) -> list:
+        """Decoded permission_bits, in Permission declaration order"""
+        return list(permissions_from_mask(self.permission_bits or 0))
+
+
+class UserTombstone(Base):
+    """A deleted user, kept so the change feed can report the deletion"""
+    __tablename__ = "user_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=NEXT_ROW_VERSION, index=True)
+    deleted_at = Column(Float, default=time.time)
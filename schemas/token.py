@@ -22,3 +22,8 @@ class TokenPair(BaseModel):
     access_token: str
     refresh_token: str
     token_type: str
+
+
+class RefreshRequest(BaseModel):
+    """Schema for exchanging a refresh token for a new pair"""
+    refresh_token: str
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 from enum import Enum
 from sqlalchemy.ext.mutable import MutableList
 from pydantic import BaseModel, EmailStr, model_validator, Field, ConfigDict, field_validator
@@ -62,4 +62,115 @@ class User(UserBase):
     id: int = Field(..., alias="_id")
     role: Role = Role.USER
     permissions: list[Permission] = []
-    disabled: bool = False
\ No newline at end of file
+    disabled: bool = False
+
+
+class UserImportResult(BaseModel):
+    """Outcome of one record of a bulk import"""
+    line: int
+    status: Literal["created", "invalid", "duplicate"]
+    id: int | None = None
+    username: str | None = None
+    detail: str | None = None
+
+
+class UserImportSummary(BaseModel):
+    """Schema for the bulk import response"""
+    created: int
+    failed: int
+    results: list[UserImportResult]
+
+
+class UserBatchOperation(BaseModel):
+    """One change applied by the batch endpoint"""
+    op: Literal["set_role", "set_status", "add_permission", "remove_permission"]
+    role: Role | None = None
+    disabled: bool | None = None
+    permission: Permission | None = None
+
+    @model_validator(mode="after")
+    def check_argument(self):
+        argument = {
+            "set_role": "role",
+            "set_status": "disabled",
+            "add_permission": "permission",
+            "remove_permission": "permission",
+        }[self.op]
+        if getattr(self, argument) is None:
+            raise ValueError(f"{self.op} requires {argument}")
+        return self
+
+    def key(self) -> tuple:
+        """Operations with equal keys can be applied to their users in one statement."""
+        return self.op, self.role, self.disabled, self.permission
+
+
+class UserBatchItem(UserBatchOperation):
+    user_id: int
+
+
+class UserBatchFilter(BaseModel):
+    """Selects users like the listing endpoint's filters"""
+    role: Role | None = None
+    disabled: bool | None = None
+    username_prefix: str | None = None
+
+
+class UserBatchRequest(BaseModel):
+    """Either a list of per-user items, or one operation for every user matching a filter.
+
+    The filter is required with an operation; an empty one (``{}``) selects every user.
+    """
+    items: list[UserBatchItem] = Field(default_factory=list, max_length=10_000)
+    filter: UserBatchFilter | None = None
+    operation: UserBatchOperation | None = None
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if bool(self.items) == (self.operation is not None):
+            raise ValueError("Send either items, or an operation with a filter")
+        if self.filter is not None and self.operation is None:
+            raise ValueError("A filter needs an operation")
+        if self.operation is not None and self.filter is None:
+            raise ValueError("An operation needs a filter; send an empty filter to change every user")
+        return self
+
+
+class UserBatchResult(BaseModel):
+    """Outcome for one user of a batch"""
+    user_id: int
+    status: Literal["updated", "not_found", "rejected"]
+    detail: str | None = None
+
+
+class UserBatchSummary(BaseModel):
+    """Schema for the batch endpoint response"""
+    updated: int
+    failed: int
+    results: list[UserBatchResult]
+
+
+class UserLookupResponse(BaseModel):
+    """Users found by the lookup endpoint, in request order, and what wasn't found"""
+    users: list[User]
+    missing_ids: list[int]
+    missing_usernames: list[str]
+
+
+class UserChange(BaseModel):
+    """One entry of the change feed: the user's current state, or its deletion"""
+    version: int
+    user_id: int
+    deleted: bool = False
+    user: User | None = None
+
+
+class UserChangesResponse(BaseModel):
+    """Changes after the client's cursor, in version order.
+
+    Pass ``next_since`` back as ``since`` to continue; ``has_more`` means another
+    page is already waiting.
+    """
+    changes: list[UserChange]
+    next_since: int
+    has_more: bool = False
@@ -0,0 +1 @@
+PASSWORD = "password"
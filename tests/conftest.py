@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+from itertools import count
+
+# Settings are read at import time, so the environment is set before any app module loads
+os.environ["SQLITE_DB_NAME"] = os.path.join(tempfile.mkdtemp(prefix="uknf-test-"), "test.sqlite3")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["ARGON2_TIME_COST"] = "1"
+os.environ["ARGON2_MEMORY_COST"] = "8192"
+os.environ["ARGON2_PARALLELISM"] = "1"
+os.environ["LOGIN_GUARD_IP_FREE_ATTEMPTS"] = "1000000"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from tests import PASSWORD
+
+_names = count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One app and database for the whole run; tests create their own uniquely named users."""
+    from core.database_utils import init_database
+    from main import app
+
+    init_database(force_recreate=True)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client):
+    """Register a user and return ``(id, username)``."""
+    def make(role: str = "user") -> tuple[int, str]:
+        username = f"user{next(_names)}"
+        response = client.post("/users/user", json={
+            "email": f"{username}@example.com", "username": username, "password": PASSWORD, "role": role,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()["_id"], username
+    return make
+
+
+@pytest.fixture
+def login(client):
+    """Log in and return the token pair."""
+    def log_in(username: str) -> dict:
+        response = client.post("/token", data={"username": username, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return log_in
+
+
+@pytest.fixture
+def admin_headers(make_user, login):
+    _, username = make_user("admin")
+    return {"Authorization": f"Bearer {login(username)['access_token']}"}
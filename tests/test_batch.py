@@ -0,0 +1,44 @@
+"""The batch endpoint never leaves the system without an admin."""
+
+
+def _admin_ids(client, headers) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        params = {"role": "admin", "limit": 100} | ({"cursor": cursor} if cursor else {})
+        response = client.get("/users/", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        ids.extend(user["_id"] for user in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return ids
+
+
+def _statuses(response) -> dict[int, str]:
+    assert response.status_code == 200, response.text
+    return {result["user_id"]: result["status"] for result in response.json()["results"]}
+
+
+def test_items_demoting_every_admin_keep_the_lowest_id(client, make_user, admin_headers):
+    make_user("admin")
+    admins = _admin_ids(client, admin_headers)
+    items = [{"user_id": user_id, "op": "set_role", "role": "user"} for user_id in admins]
+
+    statuses = _statuses(client.post("/users/batch", json={"items": items}, headers=admin_headers))
+
+    assert statuses == {user_id: "updated" for user_id in admins} | {min(admins): "rejected"}
+
+
+def test_filter_demoting_every_admin_keeps_the_lowest_id(client, make_user, admin_headers):
+    make_user("admin")
+    admins = _admin_ids(client, admin_headers)
+    batch = {"operation": {"op": "set_role", "role": "user"}, "filter": {"role": "admin"}}
+
+    statuses = _statuses(client.post("/users/batch", json=batch, headers=admin_headers))
+
+    assert statuses == {user_id: "updated" for user_id in admins} | {min(admins): "rejected"}
+
+
+def test_operation_needs_a_filter(client, admin_headers):
+    batch = {"operation": {"op": "set_status", "disabled": True}}
+
+    assert client.post("/users/batch", json=batch, headers=admin_headers).status_code == 422
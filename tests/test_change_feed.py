@@ -0,0 +1,79 @@
+"""The change feed returns every write after a cursor, in version order, once."""
+import threading
+import time
+
+from core.config import settings
+
+
+def _changes(client, headers, **params):
+    response = client.get("/users/changes", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _head(client, headers) -> int:
+    """The cursor after every change made so far."""
+    page = {"next_since": 0, "has_more": True}
+    while page["has_more"]:
+        page = _changes(client, headers, since=page["next_since"], limit=1000)
+    return page["next_since"]
+
+
+def test_next_since_round_trips(client, make_user, admin_headers):
+    since = _head(client, admin_headers)
+    first, _ = make_user()
+
+    page = _changes(client, admin_headers, since=since)
+    second, _ = make_user()
+    after = _changes(client, admin_headers, since=page["next_since"])
+
+    assert [change["user_id"] for change in page["changes"]] == [first]
+    assert [change["user_id"] for change in after["changes"]] == [second]
+    assert _changes(client, admin_headers, since=after["next_since"])["changes"] == []
+
+
+def test_batch_larger_than_limit_is_not_split(client, make_user, admin_headers):
+    user_ids = [make_user()[0] for _ in range(5)]
+    since = _head(client, admin_headers)
+    items = [{"user_id": user_id, "op": "set_status", "disabled": True} for user_id in user_ids]
+    assert client.post("/users/batch", json={"items": items}, headers=admin_headers).status_code == 200
+
+    page = _changes(client, admin_headers, since=since, limit=2)
+
+    assert sorted(change["user_id"] for change in page["changes"]) == user_ids
+    assert len({change["version"] for change in page["changes"]}) == 1
+    assert page["next_since"] == page["changes"][0]["version"]
+    assert not page["has_more"]
+
+
+def test_delete_leaves_a_tombstone(client, make_user, admin_headers):
+    user_id, _ = make_user()
+    since = _head(client, admin_headers)
+
+    assert client.delete(f"/users/{user_id}", headers=admin_headers).status_code == 204
+
+    [change] = _changes(client, admin_headers, since=since)["changes"]
+    assert change["user_id"] == user_id
+    assert change["deleted"]
+    assert change["user"] is None
+
+
+def test_long_poll_returns_when_another_request_commits(client, make_user, admin_headers, monkeypatch):
+    # Only the commit's notification can end the wait early
+    monkeypatch.setattr(settings, "CHANGE_FEED_POLL_SECONDS", 30.0)
+    since = _head(client, admin_headers)
+    results = {}
+
+    def poll():
+        started = time.monotonic()
+        results["page"] = _changes(client, admin_headers, since=since, wait=20)
+        results["elapsed"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.2)
+    user_id, _ = make_user()
+    poller.join(timeout=25)
+
+    assert [change["user_id"] for change in results["page"]["changes"]] == [user_id]
+    assert results["elapsed"] < 5
@@ -0,0 +1,45 @@
+"""User reads carry strong ETags and answer a matching If-None-Match with 304."""
+
+
+def _revalidate(client, path, headers, **params):
+    first = client.get(path, params=params, headers=headers)
+    assert first.status_code == 200, first.text
+    etag = first.headers["etag"]
+    again = client.get(path, params=params, headers=headers | {"If-None-Match": etag})
+    return etag, again
+
+
+def test_me(client, make_user, login):
+    _, username = make_user()
+    headers = {"Authorization": f"Bearer {login(username)['access_token']}"}
+
+    etag, again = _revalidate(client, "/users/me", headers)
+
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+
+def test_user_by_id_changes_after_a_mutation(client, make_user, admin_headers):
+    user_id, _ = make_user()
+    etag, again = _revalidate(client, f"/users/{user_id}", admin_headers)
+    assert again.status_code == 304
+
+    client.patch(f"/users/{user_id}/status", params={"disabled": True}, headers=admin_headers)
+    changed = client.get(f"/users/{user_id}", headers=admin_headers | {"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_listing_page_changes_after_a_mutation(client, make_user, admin_headers):
+    user_id, username = make_user()
+    params = {"username_prefix": username, "limit": 10}
+    etag, again = _revalidate(client, "/users/", admin_headers, **params)
+    assert again.status_code == 304
+
+    client.post(f"/users/{user_id}/permissions/add", params={"permission": "view:metrics"}, headers=admin_headers)
+    changed = client.get("/users/", params=params, headers=admin_headers | {"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
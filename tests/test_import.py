@@ -0,0 +1,11 @@
+"""Bulk import reports bad lines individually instead of failing the request."""
+
+
+def test_undecodable_line_is_invalid(client, admin_headers):
+    body = b'\xff\xfe{"a":1}\n{"email": "imported@example.com", "username": "imported", "password": "pw"}\n'
+
+    response = client.post("/users/import", content=body, headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [(result["line"], result["status"]) for result in results] == [(1, "invalid"), (2, "created")]
@@ -0,0 +1,16 @@
+"""Ids and cursors too large for an SQLite INTEGER are client errors, not 500s."""
+import base64
+
+
+def test_oversized_cursor(client, admin_headers):
+    cursor = base64.urlsafe_b64encode(b"id:" + b"9" * 30).decode().rstrip("=")
+
+    assert client.get("/users/", params={"cursor": cursor}, headers=admin_headers).status_code == 400
+
+
+def test_oversized_lookup_id(client, admin_headers):
+    assert client.get("/users/lookup", params={"id": 10 ** 30}, headers=admin_headers).status_code == 422
+
+
+def test_oversized_change_feed_cursor(client, admin_headers):
+    assert client.get("/users/changes", params={"since": 10 ** 30}, headers=admin_headers).status_code == 422
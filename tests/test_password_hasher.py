@@ -0,0 +1,50 @@
+"""Login admission reserves its place in the hashing backlog up front."""
+import asyncio
+
+import pytest
+
+from core.security import HashingQueueFull, PasswordHasher, get_password_hash
+from tests import PASSWORD
+
+
+def test_burst_is_bounded_before_any_work_starts():
+    hasher = PasswordHasher(max_workers=1, max_queue=2)
+
+    slots = [hasher.admit() for _ in range(3)]
+    with pytest.raises(HashingQueueFull):
+        hasher.admit()
+
+    for slot in slots:
+        with slot:
+            pass
+    assert hasher.stats()["in_flight"] == 0
+    with hasher.admit():
+        assert hasher.stats()["in_flight"] == 1
+
+
+def test_inline_hashing_never_sheds():
+    hasher = PasswordHasher(max_workers=0, max_queue=1)
+
+    for _ in range(10):
+        hasher.admit()
+    assert hasher.stats()["in_flight"] == 0
+
+
+def test_login_is_admitted_during_an_import():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    stored = get_password_hash(PASSWORD)
+
+    async def login_during_import():
+        imports = [asyncio.create_task(hasher.hash(PASSWORD)) for _ in range(8)]
+        await asyncio.sleep(0)
+        assert hasher.stats()["queue_depth"] > hasher.max_queue
+        with hasher.admit():
+            verified = await hasher.verify(PASSWORD, stored)
+        await asyncio.gather(*imports)
+        return verified
+
+    try:
+        assert asyncio.run(login_during_import())
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["in_flight"] == 0
@@ -0,0 +1,103 @@
+"""Permissions live in users.permission_bits, with a partial index per permission."""
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+import core.database_utils as database_utils
+from core.database import engine
+from crud.user import _filter_conditions
+from models.user import User
+from schemas.user import Permission
+
+
+def test_filter_by_permission(client, make_user, admin_headers):
+    granted, _ = make_user()
+    plain, _ = make_user()
+    client.post(f"/users/{granted}/permissions/add", params={"permission": "manage:roles"}, headers=admin_headers)
+
+    ids = set()
+    cursor = None
+    while True:
+        params = {"permission": "manage:roles", "limit": 100} | ({"cursor": cursor} if cursor else {})
+        response = client.get("/users/", params=params, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        ids.update(user["_id"] for user in response.json())
+        for user in response.json():
+            assert "manage:roles" in user["permissions"]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert granted in ids
+    assert plain not in ids
+
+
+def test_permission_filter_uses_partial_index():
+    query = sa.select(User.id).where(*_filter_conditions(None, None, None, Permission.MANAGE_ROLES)).order_by(User.id)
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query.compile(dialect=engine.dialect)}").all()
+
+    assert any("ix_users_has_manage_roles" in row[-1] for row in plan), plan
+
+
+def test_add_and_remove_permission_round_trip(client, make_user, admin_headers):
+    user_id, _ = make_user()
+    added = client.post(f"/users/{user_id}/permissions/add", params={"permission": "delete:user"}, headers=admin_headers)
+    again = client.post(f"/users/{user_id}/permissions/add", params={"permission": "delete:user"}, headers=admin_headers)
+    removed = client.post(
+        f"/users/{user_id}/permissions/remove", params={"permission": "delete:user"}, headers=admin_headers
+    )
+
+    assert added.json()["permissions"] == ["delete:user"]
+    assert again.json()["permissions"] == ["delete:user"]
+    assert removed.json()["permissions"] == []
+
+
+def _old_database(tmp_path) -> sa.Engine:
+    old_engine = sa.create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    with old_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL UNIQUE, "
+            "username VARCHAR(50) NOT NULL UNIQUE, password_hash VARCHAR(255) NOT NULL, "
+            "role VARCHAR(7) NOT NULL, permissions JSON NOT NULL, disabled BOOLEAN)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO users (email, username, password_hash, role, permissions, disabled) VALUES "
+            "('a@example.com', 'a', 'x', 'USER', '[]', 0), "
+            "('b@example.com', 'b', 'x', 'USER', '[\"manage:roles\", \"manage:roles\", \"bogus\", \"read:user\"]', 0)"
+        )
+    return old_engine
+
+
+def test_migrates_json_permissions(tmp_path, monkeypatch):
+    old_engine = _old_database(tmp_path)
+    monkeypatch.setattr(database_utils, "engine", old_engine)
+
+    database_utils.ensure_indexes()
+
+    with old_engine.connect() as conn:
+        columns = {column["name"] for column in sa.inspect(conn).get_columns("users")}
+        rows = conn.exec_driver_sql("SELECT username, permission_bits, row_version FROM users ORDER BY id").all()
+        indexes = {index["name"] for index in sa.inspect(conn).get_indexes("users")}
+    old_engine.dispose()
+
+    assert "permissions" not in columns
+    assert rows == [("a", 0, 1), ("b", 2 | 16, 2)]
+    assert "ix_users_has_manage_roles" in indexes
+
+
+def test_app_startup_migrates(client, tmp_path, monkeypatch):
+    from main import app
+
+    old_engine = _old_database(tmp_path)
+    monkeypatch.setattr(database_utils, "engine", old_engine)
+
+    with TestClient(app):
+        pass
+
+    with old_engine.connect() as conn:
+        tables = set(sa.inspect(conn).get_table_names())
+        columns = {column["name"] for column in sa.inspect(conn).get_columns("users")}
+    old_engine.dispose()
+
+    assert "user_tombstones" in tables
+    assert "permission_bits" in columns
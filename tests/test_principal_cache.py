@@ -0,0 +1,34 @@
+"""Cached principals never outlive a write to their user."""
+from core.rbac import Principal, PrincipalCache
+from schemas.user import Role
+
+
+def _principal(user_id: int, username: str) -> Principal:
+    return Principal(
+        id=user_id, username=username, email=f"{username}@example.com", role=Role.USER, permissions=(),
+        disabled=False, permission_mask=0, row_version=1,
+    )
+
+
+def test_fill_racing_an_invalidation_is_skipped():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+
+    cache.invalidate(1)
+    cache.set("alice", _principal(1, "alice"), generation=generation)
+    cache.set("bob", _principal(2, "bob"), generation=generation)
+
+    assert cache.get("alice") is None
+    assert cache.get("bob") is not None
+    cache.set("alice", _principal(1, "alice"), generation=cache.generation())
+    assert cache.get("alice") is not None
+
+
+def test_disabled_user_is_rejected_on_the_next_request(client, make_user, login, admin_headers):
+    user_id, username = make_user()
+    headers = {"Authorization": f"Bearer {login(username)['access_token']}"}
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    assert client.patch(f"/users/{user_id}/status", params={"disabled": True}, headers=admin_headers).status_code == 200
+
+    assert client.get("/users/me", headers=headers).status_code == 400
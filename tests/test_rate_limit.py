@@ -0,0 +1,62 @@
+"""Requests over the limit get 429, with buckets per token subject or per client IP."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.middleware import RateLimitMiddleware
+from core.rate_limit import TokenBucketStore, SQLiteTokenBucketStore
+from core.security import create_access_token
+
+ANON_REQUESTS = 2
+AUTH_REQUESTS = 3
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limited(request, tmp_path):
+    """A bare app behind the middleware; the shared test app runs with rate limiting off."""
+    app = FastAPI()
+    store = TokenBucketStore() if request.param == "memory" else SQLiteTokenBucketStore(str(tmp_path / "buckets"))
+    app.add_middleware(
+        RateLimitMiddleware, store=store, anon_requests=ANON_REQUESTS, auth_requests=AUTH_REQUESTS,
+        window_seconds=3600, exempt_paths=["/health"],
+    )
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _headers(username: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'name': username})}"}
+
+
+def test_over_the_limit_gets_429_with_retry_after(limited):
+    statuses = [limited.get("/ping").status_code for _ in range(ANON_REQUESTS)]
+    rejected = limited.get("/ping")
+
+    assert statuses == [200] * ANON_REQUESTS
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+
+
+def test_token_subject_and_ip_have_separate_buckets(limited):
+    alice, bob = _headers("alice"), _headers("bob")
+
+    assert [limited.get("/ping", headers=alice).status_code for _ in range(AUTH_REQUESTS + 1)][-1] == 429
+    assert limited.get("/ping", headers=bob).status_code == 200
+    assert limited.get("/ping").status_code == 200
+    # An unverifiable token is anonymous, so it shares the IP's bucket
+    assert limited.get("/ping", headers={"Authorization": "Bearer forged"}).status_code == 200
+    assert limited.get("/ping").status_code == 429
+
+
+def test_health_is_exempt(limited):
+    assert [limited.get("/health").status_code for _ in range(ANON_REQUESTS * 3)] == [200] * (ANON_REQUESTS * 3)
+    assert limited.get("/ping").status_code == 200
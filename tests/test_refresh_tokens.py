@@ -0,0 +1,44 @@
+"""Refresh tokens rotate on use, and replaying a used one revokes its whole family."""
+
+
+def _refresh(client, refresh_token: str):
+    return client.post("/token/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_pair(client, make_user, login):
+    _, username = make_user()
+    first = login(username)
+
+    response = _refresh(client, first["refresh_token"])
+
+    assert response.status_code == 200, response.text
+    second = response.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    headers = {"Authorization": f"Bearer {second['access_token']}"}
+    assert client.get("/users/me", headers=headers).json()["username"] == username
+
+
+def test_reused_refresh_token_revokes_the_family(client, make_user, login):
+    _, username = make_user()
+    first = login(username)
+    second = _refresh(client, first["refresh_token"]).json()
+
+    assert _refresh(client, first["refresh_token"]).status_code == 401
+    assert _refresh(client, second["refresh_token"]).status_code == 401
+
+
+def test_access_token_is_not_a_refresh_token(client, make_user, login):
+    _, username = make_user()
+    pair = login(username)
+
+    assert _refresh(client, pair["access_token"]).status_code == 401
+    headers = {"Authorization": f"Bearer {pair['refresh_token']}"}
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_disabled_user_cannot_refresh(client, make_user, login, admin_headers):
+    user_id, username = make_user()
+    pair = login(username)
+    assert client.patch(f"/users/{user_id}/status", params={"disabled": True}, headers=admin_headers).status_code == 200
+
+    assert _refresh(client, pair["refresh_token"]).status_code == 401
@@ -0,0 +1,67 @@
+"""Access tokens can be revoked, and every worker following the table sees the revocation."""
+import asyncio
+
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from core.config import settings
+from core.revocation import RevocationList
+
+
+def _headers(pair: dict) -> dict:
+    return {"Authorization": f"Bearer {pair['access_token']}"}
+
+
+def _claims(pair: dict) -> dict:
+    return jwt.get_unverified_claims(pair["access_token"])
+
+
+def _reloaded_list() -> RevocationList:
+    """A revocation list as another worker would build it from the table."""
+    async def reload():
+        # Its own engine, so no pooled connection crosses over to the app's event loop
+        engine = create_async_engine(f"sqlite+aiosqlite:///{settings.SQLITE_DB_NAME}")
+        revocations = RevocationList()
+        async with AsyncSession(engine) as db:
+            await revocations.reload(db)
+        await engine.dispose()
+        return revocations
+    return asyncio.run(reload())
+
+
+def test_logout_revokes_access_and_refresh_token(client, make_user, login):
+    _, username = make_user()
+    pair = login(username)
+    assert client.get("/users/me", headers=_headers(pair)).status_code == 200
+
+    response = client.post("/token/logout", json={"refresh_token": pair["refresh_token"]}, headers=_headers(pair))
+
+    assert response.status_code == 204
+    assert client.get("/users/me", headers=_headers(pair)).status_code == 401
+    assert client.post("/token/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+    assert _reloaded_list().is_revoked(_claims(pair))
+
+
+def test_logout_leaves_other_sessions_alone(client, make_user, login):
+    _, username = make_user()
+    kept, revoked = login(username), login(username)
+
+    client.post("/token/logout", headers=_headers(revoked))
+
+    assert client.get("/users/me", headers=_headers(kept)).status_code == 200
+
+
+def test_revoke_user_tokens(client, make_user, login, admin_headers):
+    user_id, username = make_user()
+    pair = login(username)
+
+    assert client.post(f"/users/{user_id}/revoke-tokens", headers=admin_headers).status_code == 204
+
+    assert client.get("/users/me", headers=_headers(pair)).status_code == 401
+    assert client.post("/token/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+    assert _reloaded_list().is_revoked(_claims(pair))
+    assert client.get("/users/me", headers=_headers(login(username))).status_code == 200
+
+
+def test_revoke_unknown_user(client, admin_headers):
+    assert client.post("/users/999999/revoke-tokens", headers=admin_headers).status_code == 404
@@ -0,0 +1,70 @@
+"""Each admin mutation, including a batch over many users, is one statement on the writer."""
+import pytest
+from sqlalchemy import event, func, select
+
+from core.database import SessionLocal, async_engine
+from core.database_seed import seed_users
+from models.user import User
+from tests import PASSWORD
+
+BATCH_USERS = 1_000
+
+MUTATIONS = [
+    ("update username", "PATCH", "/users/{id}", {"json": {"username": "renamed{id}"}}),
+    ("update email", "PATCH", "/users/{id}", {"json": {"email": "renamed{id}@example.com"}}),
+    ("update role", "PATCH", "/users/{id}/role", {"params": {"role": "manager"}}),
+    ("update status", "PATCH", "/users/{id}/status", {"params": {"disabled": True}}),
+    ("add permission", "POST", "/users/{id}/permissions/add", {"params": {"permission": "view:metrics"}}),
+    ("remove permission", "POST", "/users/{id}/permissions/remove", {"params": {"permission": "view:metrics"}}),
+]
+
+
+@pytest.fixture
+def writer_statements():
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def warm_admin(client, admin_headers):
+    # Cache the admin's principal so its own lookup isn't counted
+    assert client.get("/users/me", headers=admin_headers).status_code == 200
+    return admin_headers
+
+
+def _format(value, user_id: int):
+    if isinstance(value, dict):
+        return {key: _format(item, user_id) for key, item in value.items()}
+    return value.format(id=user_id) if isinstance(value, str) else value
+
+
+@pytest.mark.parametrize("method, path, kwargs", [mutation[1:] for mutation in MUTATIONS],
+                         ids=[mutation[0] for mutation in MUTATIONS])
+def test_mutation_is_one_statement(client, make_user, warm_admin, writer_statements, method, path, kwargs):
+    user_id, _ = make_user()
+    writer_statements.clear()
+
+    response = client.request(method, path.format(id=user_id), headers=warm_admin, **_format(kwargs, user_id))
+
+    assert response.status_code == 200, response.text
+    assert len(writer_statements) == 1, writer_statements
+
+
+def test_batch_is_one_statement(client, warm_admin, writer_statements):
+    with SessionLocal() as db:
+        first = db.scalar(select(func.max(User.id))) + 1
+    seed_users(BATCH_USERS, passwords=(PASSWORD,))
+    items = [{"user_id": user_id, "op": "set_status", "disabled": True} for user_id in range(first, first + BATCH_USERS)]
+    writer_statements.clear()
+
+    response = client.post("/users/batch", json={"items": items}, headers=warm_admin)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == BATCH_USERS
+    assert len(writer_statements) == 1, writer_statements
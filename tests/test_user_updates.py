@@ -0,0 +1,25 @@
+"""A failed update leaves the user's tokens exactly as they were."""
+from core.config import settings
+
+
+def test_failed_rename_keeps_embedded_tokens_valid(client, make_user, login, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_EMBED_PERMISSIONS", True)
+    user_id, username = make_user()
+    _, taken = make_user()
+    headers = {"Authorization": f"Bearer {login(username)['access_token']}"}
+
+    response = client.patch(f"/users/{user_id}", json={"username": taken}, headers=headers)
+
+    assert response.status_code == 400
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+
+def test_rename_expires_embedded_tokens(client, make_user, login, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_EMBED_PERMISSIONS", True)
+    user_id, username = make_user()
+    headers = {"Authorization": f"Bearer {login(username)['access_token']}"}
+
+    response = client.patch(f"/users/{user_id}", json={"username": f"{username}-renamed"}, headers=headers)
+
+    assert response.status_code == 200
+    assert client.get("/users/me", headers=headers).status_code == 401
@@ -0,0 +1,30 @@
+import hashlib
+from collections.abc import Iterable
+
+
+def user_etag(user_id: int, row_version: int) -> str:
+    """Strong ETag for one user. Versions are never reused, so neither are tags."""
+    return f'"{user_id}-{row_version}"'
+
+
+def list_etag(versions: Iterable[tuple[int, int]]) -> str:
+    """Strong ETag for a page of users, from each row's (id, row_version)."""
+    digest = hashlib.blake2b(digest_size=12)
+    for user_id, row_version in versions:
+        digest.update(f"{user_id}-{row_version};".encode())
+    return f'"l-{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag``.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so a ``W/``
+    prefix added by a proxy doesn't defeat it.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
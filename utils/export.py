@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+
+EXPORT_FIELDS = ("id", "email", "username", "role", "permissions", "disabled")
+
+
+def _value(value):
+    return getattr(value, "value", value)
+
+
+async def ndjson_lines(rows: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """Serialize rows of EXPORT_FIELDS as newline-delimited JSON, one row at a time."""
+    async for row in rows:
+        record = dict(zip(EXPORT_FIELDS, map(_value, row)))
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+async def csv_lines(rows: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """Serialize rows of EXPORT_FIELDS as CSV with a header line, one row at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(EXPORT_FIELDS)
+    yield flush()
+    async for row_id, email, username, role, permissions, disabled in rows:
+        writer.writerow((row_id, email, username, _value(role), " ".join(permissions or ()), disabled))
+        yield flush()
+
+
+async def chunked(lines: AsyncIterator[str], size: int = 256) -> AsyncIterator[str]:
+    """Join serialized lines into chunks of ``size`` so the response isn't one send per row."""
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield "".join(chunk)
@@ -0,0 +1,19 @@
+from collections.abc import AsyncIterator
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """Split a streamed body into ``(line_number, line)`` pairs, skipping blank lines.
+
+    Lines stay bytes, so a line that isn't valid UTF-8 fails on its own when parsed.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
@@ -0,0 +1,23 @@
+import base64
+import binascii
+
+# Largest value an SQLite INTEGER holds; bigger ones fail with OverflowError when bound
+MAX_SQLITE_INTEGER = 2 ** 63 - 1
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing after the given primary key."""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Primary key encoded in a cursor. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    prefix, _, value = raw.partition(":")
+    if prefix != "id" or not value.isdigit() or int(value) > MAX_SQLITE_INTEGER:
+        raise ValueError("Invalid cursor")
+    return int(value)